@@ -1 +1,14 @@
-#
+# -*- coding: utf-8 -*-
+u"""Profile imports when :mod:`pykern.pkimporttime` is enabled
+
+Imported before :mod:`pykern.pkcli` by every console script.
+
+:copyright: Copyright (c) 2016 RadiaSoft LLC.  All Rights Reserved.
+:license: http://www.apache.org/licenses/LICENSE-2.0.html
+"""
+from __future__ import absolute_import, division, print_function
+import os as _os
+
+if _os.environ.get('PYKERN_PKCLI_PROFILE_IMPORTS'):
+    from pykern import pkimporttime as _pkimporttime
+    _pkimporttime.install_from_env()
@@ -3,6 +3,19 @@
 
 Not a complete wrapper. New routines added as required.
 
+Arrays can be shared with numpy (`to_numpy`) and `memoryview`
+(`to_memoryview`) without copying. Array files consist of a small
+header (typecode, byte order, and length) followed by the raw values.
+They are written in chunks with `FileWriter`, read in chunks with
+`iter_file`, and mapped into memory with `mmap_file`. Values are
+copied by :mod:`array` and numpy, never element by element in Python.
+
+`Table` is a set of named, typed columns of equal length, which
+can be extended in bulk, sliced without copying, and saved to
+(and loaded from) a single file.
+
+numpy is optional and imported only by the routines which need it.
+
 :copyright: Copyright (c) 2015 Bivio Software, Inc.  All Rights Reserved.
 :license: http://www.apache.org/licenses/LICENSE-2.0.html
 """
@@ -10,13 +23,322 @@ from __future__ import absolute_import, division, print_function
 from future.utils import bytes_to_native_str
 
 import array
+import collections
+import struct
+import sys
 
 #: Future-proof typecode for double
-DOUBLE_TYPECODE = bytes_to_native_str('d')
+DOUBLE_TYPECODE = bytes_to_native_str(b'd')
 
 #: Future-proof typecode for float
 FLOAT_TYPECODE = bytes_to_native_str(b'f')
 
+#: Future-proof typecode for int (C long)
+INT_TYPECODE = bytes_to_native_str(b'l')
+
+#: Typecodes of `Table` columns
+TABLE_TYPECODES = (DOUBLE_TYPECODE, FLOAT_TYPECODE, INT_TYPECODE)
+
+#: Number of values `iter_file` reads at a time
+ITER_FILE_LENGTH = 65536
+
+#: Identifies array files
+_FILE_MAGIC = b'PKA1'
+
+#: magic, typecode, byte order, pad, length (keeps values 8-byte aligned)
+_FILE_HEADER = struct.Struct('<4scc2xQ')
+
+#: Byte order of this machine in file header
+_FILE_BYTE_ORDER = b'<' if sys.byteorder == 'little' else b'>'
+
+#: Identifies table files
+_TABLE_MAGIC = b'PKT1'
+
+#: magic, byte order, pad, number of columns, number of rows
+_TABLE_HEADER = struct.Struct('<4sc3xIQ')
+
+#: typecode, length of utf-8 name which follows
+_TABLE_COLUMN = struct.Struct('<cH')
+
+
+class FileWriter(object):
+    """Writes values to an array file in chunks
+
+    The header is rewritten with the final length on `close`::
+
+        with pkarray.FileWriter('x.pka') as w:
+            for chunk in simulation():
+                w.write(chunk)
+
+    Args:
+        path (str or py.path): file to create
+        typecode (str): type of values [DOUBLE_TYPECODE]
+
+    Attributes:
+        length (int): number of values written
+        typecode (str): type of values
+    """
+    def __init__(self, path, typecode=DOUBLE_TYPECODE):
+        self.typecode = typecode
+        self.length = 0
+        self._itemsize = array.array(typecode).itemsize
+        self._file = open(str(path), 'wb')
+        self._write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Write header and close file"""
+        if not self._file:
+            return
+        self._file.seek(0)
+        self._write_header()
+        self._file.close()
+        self._file = None
+
+    def write(self, values):
+        """Append values to the file
+
+        Args:
+            values (object): array.array, numpy.ndarray, or iterable of numbers
+        """
+        if hasattr(values, 'dtype'):
+            values = values.astype(self.typecode, copy=False)
+            values.tofile(self._file)
+            self.length += values.size
+            return
+        if isinstance(values, array.array):
+            assert values.typecode == self.typecode, \
+                '{}: typecode does not match file ({})'.format(
+                    values.typecode, self.typecode)
+        else:
+            values = array.array(self.typecode, values)
+        values.tofile(self._file)
+        self.length += len(values)
+
+    def _write_header(self):
+        self._file.write(
+            _FILE_HEADER.pack(
+                _FILE_MAGIC,
+                self.typecode.encode('ascii'),
+                _FILE_BYTE_ORDER,
+                self.length,
+            ),
+        )
+
+
+class Table(object):
+    """Named, typed columns of equal length
+
+    Columns are :mod:`array` objects, which grow with amortized
+    constant time appends. Use `extend` to add many rows at once::
+
+        t = pkarray.Table([('x', pkarray.DOUBLE_TYPECODE), ('n', pkarray.INT_TYPECODE)])
+        t.extend(dict(x=numpy_x, n=range(len(numpy_x))))
+        t.save('run.pkt')
+
+    Args:
+        columns (list or OrderedDict): pairs of name and typecode (see `TABLE_TYPECODES`)
+
+    Attributes:
+        columns (OrderedDict): name to array.array
+    """
+    def __init__(self, columns):
+        self.columns = collections.OrderedDict()
+        if hasattr(columns, 'items'):
+            columns = columns.items()
+        for n, t in columns:
+            assert t in TABLE_TYPECODES, \
+                '{}: invalid typecode for column {}'.format(t, n)
+            assert n not in self.columns, \
+                '{}: duplicate column'.format(n)
+            self.columns[n] = array.array(t)
+
+    def __len__(self):
+        for c in self.columns.values():
+            return len(c)
+        return 0
+
+    def append(self, *values):
+        """Add a row
+
+        If a value cannot be appended, the table is restored and
+        the error is raised.
+
+        Args:
+            values (tuple): one value per column in order
+        """
+        assert len(values) == len(self.columns), \
+            '{}: number of values does not match columns'.format(values)
+        n = len(self)
+        try:
+            for c, v in zip(self.columns.values(), values):
+                c.append(v)
+        except Exception:
+            for c in self.columns.values():
+                del c[n:]
+            raise
+
+    def column(self, name, start=None, stop=None):
+        """View part of a column without copying
+
+        The table cannot be extended while the view exists.
+
+        Args:
+            name (str): column
+            start (int): first row [0]
+            stop (int): row after last [len]
+
+        Returns:
+            memoryview: values of column
+        """
+        return to_memoryview(self.columns[name])[start:stop]
+
+    def extend(self, values):
+        """Add rows in bulk
+
+        Values for each column may be an array.array, numpy.ndarray,
+        or iterable. Buffers are copied with a single memory copy.
+        If the columns end up different lengths, the table is restored
+        and AssertionError is raised.
+
+        Args:
+            values (dict): column name to values for all columns
+        """
+        assert set(values) == set(self.columns), \
+            '{}: values must be supplied for all columns'.format(sorted(values))
+        n = len(self)
+        try:
+            for k, c in self.columns.items():
+                _extend(c, values[k])
+            assert len(set(len(c) for c in self.columns.values())) == 1, \
+                'values must be the same length for all columns'
+        except Exception:
+            for c in self.columns.values():
+                del c[n:]
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """Read a table written by `save`
+
+        Args:
+            path (str or py.path): file to read
+
+        Returns:
+            Table: new object
+        """
+        with open(str(path), 'rb') as f:
+            b = f.read(_TABLE_HEADER.size)
+            assert len(b) == _TABLE_HEADER.size, \
+                '{}: file too short to be a table file'.format(path)
+            magic, byte_order, ncols, nrows = _TABLE_HEADER.unpack(b)
+            assert magic == _TABLE_MAGIC, \
+                '{}: not a table file'.format(path)
+            assert byte_order == _FILE_BYTE_ORDER, \
+                '{}: byte order does not match this machine'.format(path)
+            columns = []
+            for _ in range(ncols):
+                t, l = _TABLE_COLUMN.unpack(f.read(_TABLE_COLUMN.size))
+                columns.append(
+                    (bytes_to_native_str(f.read(l)), bytes_to_native_str(t)),
+                )
+            res = cls(columns)
+            for c in res.columns.values():
+                c.fromfile(f, nrows)
+        return res
+
+    def save(self, path):
+        """Write columns to a single file
+
+        Args:
+            path (str or py.path): file to write
+        """
+        with open(str(path), 'wb') as f:
+            f.write(
+                _TABLE_HEADER.pack(
+                    _TABLE_MAGIC,
+                    _FILE_BYTE_ORDER,
+                    len(self.columns),
+                    len(self),
+                ),
+            )
+            for n, c in self.columns.items():
+                n = n.encode('utf-8')
+                f.write(_TABLE_COLUMN.pack(c.typecode.encode('ascii'), len(n)) + n)
+            for c in self.columns.values():
+                c.tofile(f)
+
+
+def from_numpy(value):
+    """Copy a numpy array into a new `array.array`
+
+    :mod:`array` cannot share memory with another object so this copies
+    the buffer once (twice in Python 2).
+
+    Args:
+        value (numpy.ndarray): one dimensional array
+
+    Returns:
+        array.array: typecode is ``value.dtype.char``
+    """
+    import numpy
+
+    value = numpy.ascontiguousarray(value)
+    res = array.array(value.dtype.char)
+    _frombuffer(res, value)
+    return res
+
+
+def iter_file(path, length=None):
+    """Read an array file in chunks
+
+    Args:
+        path (str or py.path): written by `FileWriter`
+        length (int): values per chunk [ITER_FILE_LENGTH]
+
+    Yields:
+        array.array: next chunk of values
+    """
+    length = length or ITER_FILE_LENGTH
+    with open(str(path), 'rb') as f:
+        typecode, n = _read_header(f, path)
+        while n > 0:
+            res = array.array(typecode)
+            res.fromfile(f, min(n, length))
+            n -= len(res)
+            yield res
+
+
+def mmap_file(path, writable=False):
+    """Map the values of an array file into memory
+
+    Requires numpy.
+
+    Args:
+        path (str or py.path): written by `FileWriter`
+        writable (bool): changes are written to the file [False]
+
+    Returns:
+        numpy.memmap: values which are read (or written) on demand
+    """
+    import numpy
+
+    with open(str(path), 'rb') as f:
+        typecode, n = _read_header(f, path)
+    return numpy.memmap(
+        str(path),
+        dtype=typecode,
+        mode='r+' if writable else 'r',
+        offset=_FILE_HEADER.size,
+        shape=(n,),
+    )
+
+
 def new_double(*args, **kwargs):
     """Creates a new double ("d") array
 
@@ -39,3 +361,116 @@ def new_float(*args, **kwargs):
         array.array: New, initialized array
     """
     return array.array(FLOAT_TYPECODE, *args, **kwargs)
+
+
+def read_file(path):
+    """Read all values of an array file
+
+    Args:
+        path (str or py.path): written by `FileWriter`
+
+    Returns:
+        array.array: values
+    """
+    with open(str(path), 'rb') as f:
+        typecode, n = _read_header(f, path)
+        res = array.array(typecode)
+        res.fromfile(f, n)
+        return res
+
+
+def to_memoryview(value):
+    """View an array's memory without copying
+
+    In Python 2, :mod:`array` does not support memoryview so
+    the view is of `to_numpy` (and requires numpy).
+
+    Args:
+        value (array.array): array to view; do not resize while viewed
+
+    Returns:
+        memoryview: shares memory with value
+    """
+    try:
+        return memoryview(value)
+    except TypeError:
+        return memoryview(to_numpy(value))
+
+
+def to_numpy(value):
+    """View an array as a numpy array without copying
+
+    Args:
+        value (array.array): array to view; do not resize while viewed
+
+    Returns:
+        numpy.ndarray: shares memory with value
+    """
+    import numpy
+
+    return numpy.frombuffer(value, dtype=value.typecode)
+
+
+def _extend(value, values):
+    """Append values to array with the fewest copies
+
+    An array.array of a different typecode is converted (e.g. float
+    to double), since `array.array.extend` requires the same typecode.
+    A numpy.ndarray is converted only within the same kind (e.g. not
+    float to int), like the conversion of an array.array.
+
+    Args:
+        value (array.array): to extend
+        values (object): array.array, numpy.ndarray, or iterable
+    """
+    if isinstance(values, array.array):
+        if values.typecode != value.typecode:
+            values = array.array(value.typecode, values)
+        value.extend(values)
+    elif hasattr(values, 'dtype'):
+        import numpy
+
+        if not numpy.can_cast(values.dtype, value.typecode, 'same_kind'):
+            raise TypeError(
+                '{}: cannot convert to typecode {}'.format(
+                    values.dtype, value.typecode))
+        _frombuffer(
+            value,
+            numpy.ascontiguousarray(values, dtype=value.typecode).ravel(),
+        )
+    else:
+        value.extend(values)
+
+
+def _frombuffer(value, buf):
+    """Append contiguous buffer to array
+
+    Args:
+        value (array.array): to extend
+        buf (object): numpy.ndarray with same item type
+    """
+    if hasattr(value, 'frombytes'):
+        value.frombytes(memoryview(buf).cast('B'))
+    else:
+        value.fromstring(buf.tostring())
+
+
+def _read_header(f, path):
+    """Read and validate an array file header
+
+    Args:
+        f (file): open at beginning
+        path (str): for errors
+
+    Returns:
+        tuple: (typecode, length)
+    """
+    b = f.read(_FILE_HEADER.size)
+    assert len(b) == _FILE_HEADER.size, \
+        '{}: file too short to be an array file'.format(path)
+    magic, typecode, byte_order, length = _FILE_HEADER.unpack(b)
+    assert magic == _FILE_MAGIC, \
+        '{}: not an array file'.format(path)
+    assert byte_order == _FILE_BYTE_ORDER, \
+        '{}: byte order does not match this machine'.format(path)
+    return bytes_to_native_str(typecode), length
@@ -13,6 +13,9 @@ that begins with a letter and contains word characters (\w).
 If the module only has one public function named default_command,
 the form is: <project> <simple-module>.
 
+Many commands can be run in one process with ``<project> --batch [file]``,
+which reads one command per line (see `batch`).
+
 The purpose of this module is to simplify command-line modules. There is
 no boilerplate. You just create a module with public functions
 in a particular package location (e.g. `pykern.pkcli`).
@@ -26,12 +29,19 @@ This module does the rest.
 from __future__ import absolute_import, division, print_function
 import argh
 import argparse
+import ast
+import hashlib
 import importlib
 import inspect
+import json
+import os
 import os.path
 import pkgutil
 import re
+import shlex
+import six
 import sys
+import time
 
 # Avoid pykern imports so avoid dependency issues for pkconfig
 from pykern import pkconfig
@@ -39,12 +49,63 @@ from pykern import pkconfig
 #: Sub-package to find command line interpreter (cli) modules will be found
 CLI_PKG = ['pkcli', 'pykern_cli']
 
+#: First arg which runs commands from a file with `batch`
+BATCH_OPTION = '--batch'
+
 #: If a module only has one command named this, then execute directly.
 DEFAULT_COMMAND = 'default_command'
 
 #: Test for first arg to see if user wants help
 _HELP_RE = re.compile(r'^-(-?help|h)$', flags=re.IGNORECASE)
 
+#: File in the user's cache directory which caches `manifest` for a cli package
+_MANIFEST_BASENAME = 'pkcli-manifest-{}.json'
+
+#: Incremented when the format of the manifest changes
+_MANIFEST_VERSION = 2
+
+
+def batch(root_pkg, commands, jobs=1, threads=False):
+    """Run many commands in one process or a pool
+
+    Each command is dispatched like `main`. Output and errors written
+    by argh (including return values) are captured. Usage errors and
+    output written directly to `sys.stdout` are not. Commands run in
+    threads share module state, so the commands must be thread safe.
+
+    Args:
+        root_pkg (str): top level package name
+        commands (iterable): argv lists of module, function, and args
+        jobs (int): size of pool; 1 runs commands in this process [1]
+        threads (bool): pool of threads instead of processes [False]
+
+    Yields:
+        dict: argv, output (str), seconds (float), and status (int)
+            in the same order as `commands`
+    """
+    pkconfig.append_load_path(root_pkg)
+    args = ((root_pkg, list(a)) for a in commands)
+    if jobs <= 1:
+        for a in args:
+            yield _batch_run(a)
+        return
+    if threads:
+        import multiprocessing.pool
+        p = multiprocessing.pool.ThreadPool(jobs)
+    else:
+        import multiprocessing
+        p = multiprocessing.Pool(jobs)
+    try:
+        for r in p.imap(_batch_run, args):
+            yield r
+    except BaseException:
+        p.terminate()
+        raise
+    # Workers exit on their own; terminate relies on SIGTERM,
+    # which the caller may have redirected (see pksubprocess)
+    p.close()
+    p.join()
+
 
 def command_error(fmt, *args, **kwargs):
     """Raise CommandError with msg
@@ -62,7 +123,12 @@ def main(root_pkg, argv=None):
     """Invokes module functions in :mod:`pykern.pykern_cli`
 
     Looks in ``<root_pkg>.pykern_cli`` for the ``argv[1]`` module. It then
-    invokes the ``argv[2]`` method of that module.
+    invokes the ``argv[2]`` method of that module. If there is no
+    ``argv[2]`` or it is a help option, the commands are printed
+    from `manifest` without importing the module.
+
+    If ``argv[1]`` is `BATCH_OPTION`, commands are read from a file
+    and run with `batch`.
 
     Args:
         root_pkg (str): top level package name
@@ -77,26 +143,182 @@ def main(root_pkg, argv=None):
     prog = os.path.basename(argv.pop(0))
     if _is_help(argv):
         return _list_all(root_pkg, prog)
-    module_name = argv.pop(0)
-    cli = _module(root_pkg, module_name)
-    if not cli:
-        return 1
-    prog = prog + ' ' + module_name
+    if argv[0] == BATCH_OPTION:
+        return _batch_main(root_pkg, prog, argv[1:])
+    return _dispatch(root_pkg, prog, argv)
+
+
+def manifest(root_pkg):
+    """Commands in ``<root_pkg>.pkcli`` found without importing the modules
+
+    Modules are parsed, not imported, so only functions defined
+    with ``def`` at the top level of a module are found. If a module
+    may bind other commands (see `_manifest_commands`), its
+    ``commands`` is None, and it is imported when needed.
+
+    The result is cached in ``$XDG_CACHE_HOME/pykern`` (default
+    ``~/.cache/pykern``) in a file named by a hash of the cli package
+    directory, so nothing is written into the package. A module is
+    parsed again only when its mtime changes. The cache is not
+    written if the directory is not writable.
+
+    Args:
+        root_pkg (str): top level package
+
+    Returns:
+        dict: module name to ``mtime`` and ``commands``, which is a sorted
+            list of dicts with ``name``, ``signature``, and ``doc`` or None
+    """
+    d = os.path.dirname(_import(root_pkg).__file__)
+    fn = _manifest_path(d)
+    prev = {}
+    try:
+        with open(fn) as f:
+            m = json.load(f)
+        if m.get('version') == _MANIFEST_VERSION:
+            prev = m['modules']
+    except Exception:
+        pass
+    res = {}
+    for _, n, ispkg in pkgutil.iter_modules([d]):
+        src = os.path.join(d, n + '.py')
+        if ispkg or not os.path.isfile(src):
+            continue
+        t = os.path.getmtime(src)
+        m = prev.get(n)
+        if not m or m['mtime'] != t:
+            try:
+                m = dict(mtime=t, commands=_manifest_commands(src))
+            except SyntaxError:
+                # Importing the module will report the error
+                continue
+        res[n] = m
+    if res != prev:
+        _manifest_write(fn, res)
+    return res
+
+
+def preload(root_pkg):
+    """Import the cli modules in `manifest`, e.g. before forking workers
+
+    Errors are written to stderr, and those modules are skipped.
+
+    Args:
+        root_pkg (str): top level package
+
+    Returns:
+        list: modules imported
+    """
+    pkconfig.append_load_path(root_pkg)
+    res = []
+    for n in sorted(manifest(root_pkg)):
+        m = _module(root_pkg, n)
+        if m:
+            res.append(m)
+    return res
+
+
+def _batch_main(root_pkg, prog, argv):
+    """Parse `BATCH_OPTION` args, run `batch`, and report
+
+    Lines are either shell words or a JSON list. Blank lines
+    and lines beginning with ``#`` are skipped. Command output is
+    written to stdout, and status and time for each command to stderr.
+
+    Args:
+        root_pkg (str): top level package name
+        prog (str): argv[0], name of program invoked
+        argv (list): args after `BATCH_OPTION`
+
+    Returns:
+        int: 0 if all commands succeeded. 1 otherwise.
+    """
     parser = argparse.ArgumentParser(
-        prog=prog, formatter_class=argh.PARSER_FORMATTER)
-    cmds = _commands(cli)
-    dc = _default_command(cmds, argv)
-    if dc:
-        argh.set_default_command(parser, dc)
-    else:
-        argh.add_commands(parser, cmds)
-        if len(argv) < 1:
-            # Python 3: parser doesn't exit if not enough commands
-            parser.error('too few arguments')
-        if argv[0][0] != '-':
-            argv[0] = argv[0].replace('_', '-')
-    argh.dispatch(parser, argv=argv)
-    return 0
+        prog=prog + ' ' + BATCH_OPTION,
+        description='run commands read from file, one per line',
+    )
+    parser.add_argument(
+        'file', nargs='?', default='-', help='commands [stdin]')
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=1, help='size of pool [1]')
+    parser.add_argument(
+        '--threads', action='store_true', help='pool of threads (not processes)')
+    a = parser.parse_args(argv)
+    f = sys.stdin if a.file == '-' else open(a.file)
+    try:
+        lines = list(_batch_parse(f))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    start = time.time()
+    failed = 0
+    for (n, _), r in zip(lines, batch(root_pkg, [l[1] for l in lines], a.jobs, a.threads)):
+        sys.stdout.write(r['output'])
+        sys.stdout.flush()
+        if r['status']:
+            failed += 1
+        sys.stderr.write(
+            '{}:{}: status={} seconds={:.3f}: {}\n'.format(
+                a.file, n, r['status'], r['seconds'], ' '.join(r['argv'])),
+        )
+    sys.stderr.write(
+        '{} commands, {} failed, seconds={:.3f}\n'.format(
+            len(lines), failed, time.time() - start),
+    )
+    return 1 if failed else 0
+
+
+def _batch_parse(lines):
+    """Parse batch input
+
+    Args:
+        lines (iterable): shell words or JSON list per line
+
+    Yields:
+        tuple: line number and argv
+    """
+    for n, l in enumerate(lines, 1):
+        l = l.strip()
+        if not l or l.startswith('#'):
+            continue
+        if l.startswith('['):
+            a = json.loads(l)
+        else:
+            a = shlex.split(l)
+        yield n, [str(x) for x in a]
+
+
+def _batch_run(args):
+    """Run one command for `batch`
+
+    Args:
+        args (tuple): root_pkg and argv
+
+    Returns:
+        dict: see `batch`
+    """
+    import traceback
+
+    root_pkg, argv = args
+    out = six.StringIO()
+    err = six.StringIO()
+    start = time.time()
+    try:
+        status = _dispatch(root_pkg, root_pkg, list(argv), out, err)
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else 0 if e.code is None else 1
+    except Exception:
+        err.write(traceback.format_exc())
+        status = 1
+    if err.getvalue():
+        # argh writes CommandError to errors_file and returns
+        status = status or 1
+    return dict(
+        argv=argv,
+        output=out.getvalue() + err.getvalue(),
+        seconds=time.time() - start,
+        status=status,
+    )
 
 
 def _commands(cli):
@@ -143,6 +365,49 @@ def _default_command(cmds, argv):
     return _wrap_default_command
 
 
+def _dispatch(root_pkg, prog, argv, output_file=None, errors_file=None):
+    """Import the module in argv and dispatch its command with argh
+
+    Args:
+        root_pkg (str): top level package name
+        prog (str): name of program
+        argv (list): module, command, and args (modified)
+        output_file (file): where argh writes output [stdout]
+        errors_file (file): where argh writes errors [stderr]
+
+    Returns:
+        int: 0 if ok. 1 if error (missing command, etc.)
+    """
+    module_name = argv.pop(0)
+    if _is_help(argv) \
+        and _manifest_help(root_pkg, prog + ' ' + module_name, module_name, argv):
+        return 1
+    cli = _module(root_pkg, module_name)
+    if not cli:
+        return 1
+    prog = prog + ' ' + module_name
+    parser = argparse.ArgumentParser(
+        prog=prog, formatter_class=argh.PARSER_FORMATTER)
+    cmds = _commands(cli)
+    dc = _default_command(cmds, argv)
+    if dc:
+        argh.set_default_command(parser, dc)
+    else:
+        argh.add_commands(parser, cmds)
+        if len(argv) < 1:
+            # Python 3: parser doesn't exit if not enough commands
+            parser.error('too few arguments')
+        if argv[0][0] != '-':
+            argv[0] = argv[0].replace('_', '-')
+    kwargs = {}
+    if output_file:
+        kwargs['output_file'] = output_file
+    if errors_file:
+        kwargs['errors_file'] = errors_file
+    argh.dispatch(parser, argv=argv, **kwargs)
+    return 0
+
+
 def _import(root_pkg, name=None):
     """Dynamically imports ``root_pkg.CLI_PKG[.name]``.
 
@@ -238,6 +503,183 @@ def _list_all(root_pkg, prog):
     return 1
 
 
+def _manifest_commands(src):
+    """Parse the public functions in `src`
+
+    `_commands` finds functions with `inspect`, so a module whose
+    commands cannot be known without running it returns None. This
+    is the case if a public function is decorated or defined inside a
+    top-level statement (e.g. ``if``), or if a public name is assigned
+    a lambda, a function defined in the module, or the result of
+    calling one.
+
+    Args:
+        src (str): path to python source
+
+    Returns:
+        list: dicts of name, signature, and doc sorted by name or None
+    """
+    with open(src, 'rb') as f:
+        tree = ast.parse(f.read(), src)
+    defs = set(
+        n.name for n in tree.body
+        if isinstance(n, (ast.FunctionDef, ast.ClassDef))
+    )
+    res = {}
+    for n in tree.body:
+        if isinstance(n, ast.FunctionDef):
+            if n.name.startswith('_'):
+                continue
+            if n.decorator_list:
+                return None
+            res[n.name] = dict(
+                doc=(ast.get_docstring(n) or '').strip(),
+                name=n.name,
+                signature=_manifest_signature(n.args),
+            )
+        elif isinstance(n, ast.Assign):
+            if _manifest_is_dynamic(n.value, defs) and any(
+                not getattr(t, 'id', '_').startswith('_') for t in n.targets
+            ):
+                return None
+        elif not isinstance(n, ast.ClassDef):
+            for c in ast.walk(n):
+                if isinstance(c, ast.FunctionDef) and not c.name.startswith('_'):
+                    return None
+    return sorted(res.values(), key=lambda c: c['name'].lower())
+
+
+def _manifest_help(root_pkg, prog, module_name, argv):
+    """Print the commands of a module from `manifest`
+
+    Exits via argparse, like `main` does when no command or help
+    is requested, so the module is never imported.
+
+    Args:
+        root_pkg (str): top level package
+        prog (str): program and module name
+        module_name (str): cli module
+        argv (list): empty or help option
+
+    Returns:
+        bool: False if the module is not in the manifest or has a default command
+    """
+    try:
+        m = manifest(root_pkg).get(module_name.replace('-', '_'))
+    except Exception:
+        # Importing the module will report the error
+        return False
+    if not m or not m['commands'] \
+        or [c['name'] for c in m['commands']] == [DEFAULT_COMMAND]:
+        return False
+    parser = argparse.ArgumentParser(
+        prog=prog, formatter_class=argh.PARSER_FORMATTER)
+    s = parser.add_subparsers()
+    for c in m['commands']:
+        # argh uses the whole docstring as help
+        s.add_parser(
+            str(c['name'].replace('_', '-')),
+            help=' '.join(x for x in (c['signature'], c['doc']) if x),
+        )
+    if not argv:
+        parser.error('too few arguments')
+    parser.parse_args(argv)
+    return True
+
+
+def _manifest_is_dynamic(node, defs):
+    """Could the assigned value be a function defined in the module?
+
+    Args:
+        node (ast.AST): value of assignment
+        defs (set): names of top-level functions and classes
+
+    Returns:
+        bool: True if value is a lambda, a def, or a call of a def
+    """
+    if isinstance(node, ast.Lambda):
+        return True
+    if isinstance(node, ast.Call):
+        node = node.func
+    return isinstance(node, ast.Name) and node.id in defs
+
+
+def _manifest_path(cli_dir):
+    """Cache file for `manifest` of cli package
+
+    Args:
+        cli_dir (str): directory of cli package
+
+    Returns:
+        str: path in user's cache directory
+    """
+    return os.path.join(
+        os.environ.get('XDG_CACHE_HOME')
+            or os.path.join(os.path.expanduser('~'), '.cache'),
+        'pykern',
+        _MANIFEST_BASENAME.format(
+            hashlib.sha1(os.path.abspath(cli_dir).encode('utf-8')).hexdigest(),
+        ),
+    )
+
+
+def _manifest_signature(args):
+    """Format function arguments parsed by `ast`
+
+    Args:
+        args (ast.arguments): parsed arguments
+
+    Returns:
+        str: signature, e.g. ``(a, b=1, *args, **kwargs)``
+    """
+    def _default(node):
+        try:
+            return repr(ast.literal_eval(node))
+        except ValueError:
+            return '...'
+
+    def _name(a):
+        # py2: Name or str; py3: arg
+        return getattr(a, 'arg', None) or getattr(a, 'id', a)
+
+    res = []
+    pos = getattr(args, 'posonlyargs', []) + args.args
+    defaults = [None] * (len(pos) - len(args.defaults)) + args.defaults
+    for a, d in zip(pos, defaults):
+        res.append(_name(a) + ('' if d is None else '=' + _default(d)))
+    if args.vararg:
+        res.append('*' + _name(args.vararg))
+    elif getattr(args, 'kwonlyargs', None):
+        res.append('*')
+    for a, d in zip(getattr(args, 'kwonlyargs', []), getattr(args, 'kw_defaults', [])):
+        res.append(_name(a) + ('' if d is None else '=' + _default(d)))
+    if args.kwarg:
+        res.append('**' + _name(args.kwarg))
+    return '(' + ', '.join(res) + ')'
+
+
+def _manifest_write(fn, modules):
+    """Write the manifest atomically, ignoring errors
+
+    Args:
+        fn (str): manifest file
+        modules (dict): value of `manifest`
+    """
+    tmp = '{}.{}'.format(fn, os.getpid())
+    try:
+        d = os.path.dirname(fn)
+        if not os.path.isdir(d):
+            os.makedirs(d, 0o700)
+        with open(tmp, 'w') as f:
+            json.dump(dict(modules=modules, version=_MANIFEST_VERSION), f)
+        os.rename(tmp, fn)
+    except (IOError, OSError):
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
 def _module(root_pkg, name):
     """Imports the module, catching `ImportError`
 
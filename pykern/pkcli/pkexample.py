@@ -61,8 +61,12 @@ any arguments::
 """
 from __future__ import absolute_import, division, print_function
 from pykern import pkcli
+from six.moves import range
 import itertools
 
+#: Number of odd numbers in each segment of the segmented sieves
+_SEGMENT_ODDS = 1 << 17
+
 
 def echo(suffix, prefix='howdy: '):
     """Concatenate prefix and suffix
@@ -86,12 +90,26 @@ def echo(suffix, prefix='howdy: '):
     return prefix + suffix
 
 
-def primes(max_prime, timeit=0):
+def primes(max_prime, timeit=0, engine='bytearray', processes=0):
     """Compute primes less than `max_prime`
 
+    The engines are:
+
+    bytearray
+        segmented sieve of Eratosthenes marking `bytearray` slices
+    numpy
+        same as bytearray but with `numpy` arrays (numpy must be installed)
+    sundaram
+        sieve of Sundaram over the whole range (no segments)
+
+    Segments can be sieved in parallel by a pool of `processes`.
+    With `timeit`, engine may be ``all`` to compare the engines.
+
     Args:
-        max_prime (int): maximum number of primes
+        max_prime (int): primes are less than this value
         timeit (int): run timeit function with this many loops
+        engine (str): bytearray, numpy, sundaram, or all [bytearray]
+        processes (int): size of process pool for segments [0, no pool]
 
     Returns:
         object: list of primes (list) or timeit result (str)
@@ -102,29 +120,195 @@ def primes(max_prime, timeit=0):
     timeit = int(timeit)
     if timeit < 0:
         pkcli.command_error('{}: timeit must be non-negative', timeit)
-    primes = _sundaram3(max_prime)
+    processes = int(processes)
+    if processes < 0:
+        pkcli.command_error('{}: processes must be non-negative', processes)
+    if engine == 'all' and timeit:
+        engines = sorted(_ENGINES)
+        try:
+            import numpy
+        except ImportError:
+            engines.remove('numpy')
+    elif engine in _ENGINES:
+        engines = [engine]
+    else:
+        pkcli.command_error(
+            '{}: engine must be one of {}', engine, sorted(_ENGINES))
     if timeit == 0:
-        return primes
+        return _ENGINES[engine](max_prime, processes)
     import timeit as t
-    secs = t.timeit(
-        stmt='_sundaram3({})'.format(max_prime),
-        number=timeit,
-        setup='from pykern.pkcli.pkexample import _sundaram3',
-    )
-    return 'computed {:,} primes in {:.3f} seconds'.format(len(primes), secs)
+    res = []
+    for e in engines:
+        op = _ENGINES[e]
+        n = len(op(max_prime, processes))
+        secs = t.timeit(lambda: op(max_prime, processes), number=timeit)
+        res.append(
+            '{}: computed {:,} primes in {:.3f} seconds ({:,.0f} numbers/second)'.format(
+                e,
+                n,
+                secs,
+                max_prime * timeit / secs if secs else float('inf'),
+            ),
+        )
+    return '\n'.join(res)
+
+
+def _base_primes(max_n):
+    """Odd primes up to and including `max_n`
+
+    Args:
+        max_n (int): largest number to check
+
+    Returns:
+        list: odd primes
+    """
+    s = bytearray([1]) * (max_n + 1)
+    i = 3
+    while i * i <= max_n:
+        if s[i]:
+            s[i * i::2 * i] = bytearray(_count(i * i, max_n + 1, 2 * i))
+        i += 2
+    return [i for i in range(3, max_n + 1, 2) if s[i]]
+
+
+def _count(start, stop, step):
+    """Length of ``range(start, stop, step)``"""
+    return max(0, (stop - start + step - 1) // step)
+
+
+def _isqrt(n):
+    """Largest integer whose square is at most n"""
+    res = int(n ** 0.5)
+    while res * res > n:
+        res -= 1
+    while (res + 1) * (res + 1) <= n:
+        res += 1
+    return res
+
+
+def _segment_bytearray(args):
+    """Primes in segment marked with `bytearray`
+
+    Args:
+        args (tuple): lo (odd), hi, and base primes
+
+    Returns:
+        list: primes between lo and hi
+    """
+    lo, hi, base = args
+    n = _count(lo, hi, 2)
+    s = bytearray([1]) * n
+    for p, i in _segment_starts(lo, hi, base):
+        s[i::p] = bytearray(_count(i, n, p))
+    return list(itertools.compress(range(lo, hi, 2), s))
+
+
+def _segment_numpy(args):
+    """Primes in segment marked with `numpy`
+
+    Args:
+        args (tuple): lo (odd), hi, and base primes
+
+    Returns:
+        list: primes between lo and hi
+    """
+    import numpy
 
+    lo, hi, base = args
+    s = numpy.ones(_count(lo, hi, 2), dtype=bool)
+    for p, i in _segment_starts(lo, hi, base):
+        s[i::p] = False
+    return (lo + 2 * numpy.flatnonzero(s)).tolist()
 
-def _sundaram3(max_n):
+
+def _segment_starts(lo, hi, base):
+    """Index of first odd multiple to mark for each base prime
+
+    Args:
+        lo (int): first (odd) number in segment
+        hi (int): end of segment (exclusive)
+        base (list): odd primes up to sqrt(hi)
+
+    Yields:
+        tuple: prime and index of its first odd multiple in segment
+    """
+    for p in base:
+        m = p * p
+        if m >= hi:
+            break
+        if m < lo:
+            m = (lo + p - 1) // p * p
+            if m % 2 == 0:
+                m += p
+        yield p, (m - lo) // 2
+
+
+def _sieve(max_n, processes, segment):
+    """Segmented sieve of primes less than `max_n`
+
+    Args:
+        max_n (int): primes are less than this value
+        processes (int): pool size (0 means no pool)
+        segment (callable): `_segment_bytearray` or `_segment_numpy`
+
+    Returns:
+        list: primes
+    """
+    if max_n <= 2:
+        return []
+    base = _base_primes(_isqrt(max_n - 1))
+    segments = [
+        (lo, min(lo + 2 * _SEGMENT_ODDS, max_n), base)
+        for lo in range(3, max_n, 2 * _SEGMENT_ODDS)
+    ]
+    if processes:
+        import multiprocessing
+
+        p = multiprocessing.Pool(processes)
+        try:
+            res = p.map(segment, segments)
+        except BaseException:
+            p.terminate()
+            raise
+        # Workers exit on their own; terminate relies on SIGTERM, which
+        # the caller may have redirected (see pksubprocess)
+        p.close()
+        p.join()
+    else:
+        res = map(segment, segments)
+    return [2] + list(itertools.chain.from_iterable(res))
+
+
+def _sieve_bytearray(max_n, processes):
+    return _sieve(max_n, processes, _segment_bytearray)
+
+
+def _sieve_numpy(max_n, processes):
+    return _sieve(max_n, processes, _segment_numpy)
+
+
+def _sundaram(max_n, processes=0):
     """Returns list of primes less than `max_n`.
 
-    Copied from `stackoverflow <http://stackoverflow.com/a/2073279>`_.
+    Sieve of Sundaram: odd numbers 2i+1 are prime unless
+    i = j + k + 2jk. Whole range, so `processes` is ignored.
     """
-    numbers = list(range(3, max_n + 1, 2))
-    half = max_n // 2
-    initial = 4
-    for step in xrange(3, max_n + 1, 2):
-        for i in xrange(initial, half, step):
-            numbers[i - 1] = 0
-        initial += 2 * (step + 1)
-        if initial > half:
-            return [2] + filter(None, numbers)
+    if max_n <= 2:
+        return []
+    k = (max_n - 2) // 2
+    marked = bytearray(k + 1)
+    i = 1
+    while 2 * i * (i + 1) <= k:
+        step = 2 * i + 1
+        start = 2 * i * (i + 1)
+        marked[start::step] = bytearray([1]) * _count(start, k + 1, step)
+        i += 1
+    return [2] + [2 * i + 1 for i in range(1, k + 1) if not marked[i]]
+
+
+#: Engine name to function(max_n, processes) returning primes less than max_n
+_ENGINES = {
+    'bytearray': _sieve_bytearray,
+    'numpy': _sieve_numpy,
+    'sundaram': _sundaram,
+}
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+u"""Run :mod:`pykern.pkcli` commands in a server to avoid startup costs
+
+The server imports the cli modules of a root package once and then
+listens on a Unix socket. For each request, it forks a child, which
+runs `pykern.pkcli.main` with the client's argv, cwd, environment,
+and stdin, stdout, and stderr (passed as file descriptors). The
+child's exit status is returned by the client::
+
+    python -m pykern.pkcliserver serve sirepo /tmp/sirepo.sock &
+    python -m pykern.pkcliserver call /tmp/sirepo.sock db upgrade
+
+The child calls `pykern.pkconfig.reload` so config is coalesced with
+the client's environment. Modules are reinitialized by their
+`pykern.pkconfig.on_reload` callbacks, e.g. `pykern.pkdebug` applies
+the arguments of the server's last `pykern.pkdebug.init` over the
+client's config. The async writer of `pykern.pkdebug` is restarted in
+the child after the fork. SIGINT and SIGTERM received by the client
+are forwarded to the child. The socket is only accessible by the user
+running the server.
+
+This module only imports the standard library so that the client
+starts quickly.
+
+:copyright: Copyright (c) 2016 RadiaSoft LLC.  All Rights Reserved.
+:license: http://www.apache.org/licenses/LICENSE-2.0.html
+"""
+from __future__ import absolute_import, division, print_function
+import errno
+import json
+import os
+import signal
+import socket
+import sys
+
+#: stdin, stdout, and stderr passed to the server
+_FDS = (0, 1, 2)
+
+#: Signals which the client forwards to the child
+_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+
+_USAGE = '''usage: python -m pykern.pkcliserver serve root_pkg socket
+       python -m pykern.pkcliserver call socket module command [args...]
+'''
+
+
+def call(path, argv):
+    """Run the command on the server listening on `path`
+
+    Args:
+        path (str): Unix socket
+        argv (list): module, command, and args (no program name)
+
+    Returns:
+        int: exit status of the command
+    """
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(path)
+        _send_fds(s, _FDS)
+        s.sendall(_encode(dict(argv=argv, cwd=os.getcwd(), env=dict(os.environ))))
+        f = s.makefile('rb')
+        pid = _read(f).get('pid')
+        if not pid:
+            return 1
+        prev = dict(
+            (sig, signal.signal(sig, lambda sig, frame: os.kill(pid, sig)))
+            for sig in _SIGNALS
+        )
+        try:
+            return _read(f).get('status', 1)
+        finally:
+            for sig, h in prev.items():
+                signal.signal(sig, h)
+    finally:
+        s.close()
+
+
+def main(argv=None):
+    """Command line for `call` and `serve`
+
+    Args:
+        argv (list): Defaults to `sys.argv`. Only used for testing.
+
+    Returns:
+        int: exit status
+    """
+    a = list(sys.argv if argv is None else argv)[1:]
+    if len(a) >= 3 and a[0] == 'serve':
+        serve(a[1], a[2])
+        return 0
+    if len(a) >= 2 and a[0] == 'call':
+        try:
+            return call(a[1], a[2:])
+        except socket.error as e:
+            sys.stderr.write('{}: server not available: {}\n'.format(a[1], e))
+            return 1
+    sys.stderr.write(_USAGE)
+    return 1
+
+
+def serve(root_pkg, path):
+    """Preload cli modules of `root_pkg` and serve requests until SIGTERM
+
+    Args:
+        root_pkg (str): top level package
+        path (str): Unix socket, removed on exit
+    """
+    from pykern import pkcli
+
+    s = _listen(path)
+    try:
+        pkcli.preload(root_pkg)
+        # Children are reaped automatically
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda sig, frame: sys.exit(0))
+        while True:
+            try:
+                c, _ = s.accept()
+            except socket.error as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            sys.stdout.flush()
+            sys.stderr.flush()
+            if os.fork() == 0:
+                s.close()
+                _child(c, root_pkg)
+            c.close()
+    finally:
+        s.close()
+        os.remove(path)
+
+
+def _child(conn, root_pkg):
+    """Run a request in the forked child and exit
+
+    Args:
+        conn (socket): client connection
+        root_pkg (str): top level package
+    """
+    status = 1
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        if 'random' in sys.modules:
+            # PY2 does not reseed after fork
+            sys.modules['random'].seed()
+        fds = _recv_fds(conn, len(_FDS))
+        req = _read(conn.makefile('rb'))
+        for fd, target in zip(fds, _FDS):
+            os.dup2(fd, target)
+            os.close(fd)
+        os.chdir(req['cwd'])
+        os.environ.clear()
+        os.environ.update(req['env'])
+        conn.sendall(_encode(dict(pid=os.getpid())))
+        status = _run(root_pkg, req['argv'])
+    except BaseException:
+        _print_exc()
+    finally:
+        try:
+            conn.sendall(_encode(dict(status=status)))
+        except BaseException:
+            pass
+        os._exit(0)
+
+
+def _encode(obj):
+    return (json.dumps(obj) + '\n').encode('utf-8')
+
+
+def _listen(path):
+    """Bind a Unix socket only accessible by this user
+
+    Args:
+        path (str): Unix socket, removed if stale
+
+    Returns:
+        socket: listening
+    """
+    if os.path.exists(path):
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            s.connect(path)
+            raise AssertionError('{}: server already running'.format(path))
+        except socket.error:
+            os.remove(path)
+        finally:
+            s.close()
+    res = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    prev = os.umask(0o177)
+    try:
+        res.bind(path)
+    finally:
+        os.umask(prev)
+    res.listen(socket.SOMAXCONN)
+    return res
+
+
+def _print_exc():
+    import traceback
+    try:
+        traceback.print_exc()
+        sys.stderr.flush()
+    except BaseException:
+        pass
+
+
+def _read(f):
+    """Read a json line, retrying when interrupted by a signal
+
+    Args:
+        f (file): socket file
+
+    Returns:
+        dict: object or empty if connection closed
+    """
+    while True:
+        try:
+            l = f.readline()
+            break
+        except (IOError, OSError, socket.error) as e:
+            if e.errno != errno.EINTR:
+                raise
+    return json.loads(l.decode('utf-8')) if l else {}
+
+
+def _recv_fds(sock, count):
+    """Receive file descriptors sent by `_send_fds`
+
+    Args:
+        sock (socket): connection
+        count (int): number of fds
+
+    Returns:
+        list: file descriptors
+    """
+    if not hasattr(sock, 'recvmsg'):
+        import _multiprocessing
+        return [_multiprocessing.recvfd(sock.fileno()) for _ in range(count)]
+    import array
+    res = array.array('i')
+    while len(res) < count:
+        _, anc, _, _ = sock.recvmsg(1, socket.CMSG_SPACE(res.itemsize))
+        for level, kind, data in anc:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                res.frombytes(data[:res.itemsize])
+        assert anc, \
+            'connection closed before file descriptors were received'
+    return list(res)
+
+
+def _run(root_pkg, argv):
+    """Dispatch argv like a console script would
+
+    Args:
+        root_pkg (str): top level package
+        argv (list): module, command, and args
+
+    Returns:
+        int: exit status
+    """
+    from pykern import pkcli
+    from pykern import pkconfig
+
+    try:
+        try:
+            pkconfig.reload()
+            return pkcli.main(root_pkg, [root_pkg] + argv)
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        sys.stderr.write('{}\n'.format(e.code))
+        return 1
+    except BaseException:
+        _print_exc()
+        return 1
+
+
+def _send_fds(sock, fds):
+    """Send file descriptors, one per byte like `_multiprocessing.sendfd`
+
+    Args:
+        sock (socket): connection
+        fds (list): file descriptors
+    """
+    if not hasattr(sock, 'sendmsg'):
+        import _multiprocessing
+        for fd in fds:
+            _multiprocessing.sendfd(sock.fileno(), fd)
+        return
+    import array
+    for fd in fds:
+        sock.sendmsg(
+            [b'\0'],
+            [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', [fd]))],
+        )
+
+
+if __name__ == '__main__':
+    sys.exit(main())
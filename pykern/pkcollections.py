@@ -11,7 +11,41 @@ a OrderedMapping don't collide.
 """
 from __future__ import absolute_import, division, print_function
 # Avoid pykern imports so avoid dependency issues for pkconfig
+import codecs
+import collections
 import json
+import re
+
+#: Class to frozenset of its attribute names (see `_reserved_names`)
+_reserved_names_cache = {}
+
+#: Minimum number of bytes or chars `json_iter_any` reads at a time
+_JSON_ITER_CHUNK = 65536
+
+#: Whitespace between JSON values
+_JSON_WS_RE = re.compile(r'[ \t\n\r]*')
+
+#: Characters which may continue a JSON number
+_JSON_NUMBER_CHARS = frozenset('+-.0123456789Ee')
+
+#: Rest of buffer could be the continuation of a JSON number
+_JSON_NUMBER_TAIL_RE = re.compile(r'[-+.0-9Ee]*\Z')
+
+#: Rest of buffer at a decode error could be a token cut off by the chunk
+_JSON_TRUNCATED_RE = re.compile(
+    # unterminated string, which may end in a backslash
+    r'(?:"[^"\\]*(?:\\.[^"\\]*)*\\?'
+    # start of a literal
+    r'|-|-?I(?:n(?:f(?:i(?:n(?:i(?:ty?)?)?)?)?)?)?|N(?:aN?)?'
+    r'|t(?:r(?:ue?)?)?|f(?:a(?:l(?:se?)?)?)?|n(?:u(?:ll?)?)?'
+    # start of a \uXXXX escape or a surrogate pair
+    r'|u[0-9a-fA-F]{0,4}(?:\\(?:u[0-9a-fA-F]{0,3})?)?'
+    r')\Z',
+)
+
+#: Iterators over a dict's items and values (avoid lists in Python 2)
+_dict_items = getattr(dict, 'iteritems', dict.items)
+_dict_values = getattr(dict, 'itervalues', dict.values)
 
 class Dict(dict):
     """A subclass of dict that allows items to be read/written as attributes.
@@ -47,16 +81,14 @@ class Dict(dict):
         raise DictNameError('{}: you cannot delete attributes', name)
 
     def __getattr__(self, name):
+        # Only called when normal attribute lookup fails
         try:
+            return self[name]
+        except KeyError:
             return self.__getattribute__(name)
-        except AttributeError:
-            try:
-                return self[name]
-            except KeyError:
-                return self.__getattribute__(name)
 
     def __setattr__(self, name, value):
-        if name in dir(self):
+        if name in _reserved_names(type(self)):
             raise DictNameError(
                 '{}: invalid key for Dict matches existing attribute'.format(name))
         super(Dict, self).__setitem__(name, value)
@@ -67,6 +99,86 @@ class DictNameError(NameError):
     pass
 
 
+class FrozenDict(dict):
+    """An immutable, hashable `dict` with attribute access like `Dict`
+
+    The hash is computed once on construction, so all values must be
+    hashable. Use `freeze` to convert nested values. `updated` returns
+    a copy with changes applied. Copying the keys is proportional to
+    the size of the dict (there is no structural sharing, because
+    FrozenDict is a `dict`), but the new hash is derived from this one
+    in time proportional to the number of changes::
+
+        x = FrozenDict(a=1, b=2)
+        assert 1 == x.a
+        y = x.updated(b=3)
+        cache[y] = expensive(y)
+
+    Mutating operations raise `TypeError`.
+    """
+    __slots__ = ('__hash',)
+
+    def __init__(self, *args, **kwargs):
+        super(FrozenDict, self).__init__(*args, **kwargs)
+        h = 0
+        for i in self.items():
+            h ^= hash(i)
+        object.__setattr__(self, '_FrozenDict__hash', h)
+
+    def __delattr__(self, name):
+        _frozen(self)
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            return self.__getattribute__(name)
+
+    def __hash__(self):
+        return self.__hash
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, super(FrozenDict, self).__repr__())
+
+    def __setattr__(self, name, value):
+        _frozen(self)
+
+    def __setitem__(self, *args, **kwargs):
+        _frozen(self)
+
+    __delitem__ = __ior__ = clear = pop = popitem = setdefault = update \
+        = __setitem__
+
+    @classmethod
+    def fromkeys(cls, *args):
+        return cls(dict.fromkeys(*args))
+
+    def updated(self, **changes):
+        """Copy with changes applied
+
+        The copy is O(n). Only the hash computation is O(changes).
+
+        Args:
+            changes (dict): keys and new values
+
+        Returns:
+            FrozenDict: new object
+        """
+        res = dict.__new__(type(self))
+        dict.update(res, self)
+        dict.update(res, changes)
+        h = self.__hash
+        for k, v in changes.items():
+            if k in self:
+                h ^= hash((k, self[k]))
+            h ^= hash((k, v))
+        object.__setattr__(res, '_FrozenDict__hash', h)
+        return res
+
+
 class OrderedMapping(object):
     """Ordered mapping can be initialized by kwargs or single argument.
 
@@ -76,11 +188,15 @@ class OrderedMapping(object):
 
     All operations are munged names to avoid collisions with the clients
     of OrderedMapping so there are no "methods" on self except operator overloads.
+
+    Values are stored as attributes. The order is kept in a slot as
+    the keys of an `collections.OrderedDict` so membership, insertion,
+    and deletion are constant time.
     """
+    __slots__ = ('__dict__', '__order', '__weakref__')
+
     def __init__(self, *args, **kwargs):
-        self.__order = []
-        # Remove __order's mangled name from __order
-        self.__order.pop(0)
+        object.__setattr__(self, '_OrderedMapping__order', collections.OrderedDict())
         if args:
             assert not kwargs, \
                 'May not pass kwargs if passing args'
@@ -119,7 +235,7 @@ class OrderedMapping(object):
 
     def __delattr__(self, name):
         super(OrderedMapping, self).__delattr__(name)
-        self.__order.remove(name)
+        del self.__order[name]
 
     def __delitem__(self, key):
         try:
@@ -131,9 +247,11 @@ class OrderedMapping(object):
         """Type of object, and order of keys and values must be the same"""
         if not type(self) == type(other):
             return False
-        # Types must be the same. "__order" is included in vars()
-        # so verifies order, too.
-        return vars(self) == vars(other)
+        # Types must be the same. OrderedDict equality verifies order.
+        return self.__order == other.__order and vars(self) == vars(other)
+
+    def __getstate__(self):
+        return [(k, getattr(self, k)) for k in self]
 
     def __getitem__(self, key):
         try:
@@ -161,11 +279,91 @@ class OrderedMapping(object):
     def __setattr__(self, name, value):
         super(OrderedMapping, self).__setattr__(name, value)
         if name not in self.__order:
-            self.__order.append(name)
+            self.__order[name] = None
 
     def __setitem__(self, key, value):
         setattr(self, key, value)
 
+    def __setstate__(self, state):
+        OrderedMapping.__init__(self, state)
+
+
+def freeze(value):
+    """Deep copy value into hashable types
+
+    Mappings become `FrozenDict`, lists and tuples become tuples, and
+    sets become frozensets. Other values are returned unchanged.
+
+    Args:
+        value (object): e.g. a `Dict` or `OrderedMapping` of config
+
+    Returns:
+        object: hashable version of value
+    """
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, (dict, OrderedMapping)):
+        return FrozenDict((k, freeze(value[k])) for k in value)
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(v) for v in value)
+    return value
+
+
+def imap_items(value, op=None):
+    """Generator version of `map_items`
+
+    Args:
+        value (object): Any object that implements iteration on keys
+        op (function): called with each key, value, in order
+            (default: return (key, value))
+
+    Returns:
+        iterator: results of op
+    """
+    if isinstance(value, dict):
+        i = _dict_items(value)
+    else:
+        i = ((k, value[k]) for k in value)
+    if not op:
+        return iter(i)
+    return (op(k, v) for k, v in i)
+
+
+def imap_keys(value, op=None):
+    """Generator version of `map_keys`
+
+    Args:
+        value (object): Any object that implements iteration on keys
+        op (function): called with each key, in order (default: return key)
+
+    Returns:
+        iterator: results of op
+    """
+    if not op:
+        return iter(value)
+    return (op(k) for k in value)
+
+
+def imap_values(value, op=None):
+    """Generator version of `map_values`
+
+    Args:
+        value (object): Any object that implements iteration on values
+        op (function): called with each key, in order (default: return value)
+
+    Returns:
+        iterator: results of op
+    """
+    if isinstance(value, dict):
+        i = _dict_values(value)
+    else:
+        i = (value[k] for k in value)
+    if not op:
+        return iter(i)
+    return (op(v) for v in i)
+
 
 def json_load_any(obj, *args, **kwargs):
     """Read json file or str with ``object_pairs_hook=Dict``
@@ -183,6 +381,47 @@ def json_load_any(obj, *args, **kwargs):
     return json.loads(o, *args, **kwargs)
 
 
+def json_iter_any(obj, *args, **kwargs):
+    """Parse JSON-lines or a top-level array incrementally
+
+    If the document begins with ``[``, yields the elements of the
+    array. Otherwise, yields each top-level value, e.g. one per line
+    of a JSON-lines file. `obj` is read in chunks so memory is bounded
+    by the size of the largest value, not the document.
+
+    Args:
+        obj (object): str or object with "read"
+        args (tuple): passed verbatim to `json.JSONDecoder`
+        kwargs (dict): object_pairs_hook overriden
+
+    Yields:
+        object: parsed JSON values
+    """
+    kwargs.setdefault('object_pairs_hook', object_pairs_hook)
+    s = _JSONStream(obj, json.JSONDecoder(*args, **kwargs))
+    c = s.peek()
+    if c != '[':
+        while c is not None:
+            yield s.decode()
+            c = s.peek()
+        return
+    s.i += 1
+    if s.peek() == ']':
+        s.i += 1
+    else:
+        while True:
+            yield s.decode()
+            c = s.peek()
+            s.i += 1
+            if c == ']':
+                break
+            if c != ',':
+                raise ValueError(
+                    '{}: expecting , or ] after array element'.format(c))
+    if s.peek() is not None:
+        raise ValueError('extra data after top-level array')
+
+
 def map_items(value, op=None):
     """Iterate over mapping, calling op with key, value
 
@@ -194,9 +433,7 @@ def map_items(value, op=None):
     Returns:
         list: list of results of op
     """
-    if not op:
-        return [(k, value[k]) for k in value]
-    return [op(k, value[k]) for k in value]
+    return list(imap_items(value, op))
 
 
 def map_keys(value, op=None):
@@ -209,18 +446,23 @@ def map_keys(value, op=None):
     Returns:
         list: list of results of op
     """
-    if not op:
-        return [k for k in value]
-    return [op(k) for k in value]
+    return list(imap_keys(value, op))
 
 
 def mapping_merge(base, to_merge):
     """Add or replace values from to_merge into base
 
+    If both are dicts and base does not override setitem, uses
+    `dict.update`.
+
     Args:
         base (object): Implements setitem
         to_merge (object): implements iter and getitem
     """
+    if isinstance(base, dict) and isinstance(to_merge, dict) \
+        and type(base).__setitem__ is dict.__setitem__:
+        dict.update(base, to_merge)
+        return
     for k in to_merge:
         base[k] = to_merge[k]
 
@@ -234,7 +476,9 @@ def map_to_dict(value):
     Returns:
         dict: Converted mapping
     """
-    return dict(map_items(value))
+    if isinstance(value, dict):
+        return dict(value)
+    return dict(imap_items(value))
 
 
 def map_values(value, op=None):
@@ -247,18 +491,160 @@ def map_values(value, op=None):
     Returns:
         list: list of results of op
     """
-    if not op:
-        return [value[k] for k in value]
-    return [op(value[k]) for k in value]
+    return list(imap_values(value, op))
+
+
+def map_values_array(value, op=None, dtype=float):
+    """Like `map_values`, but returns a `numpy.ndarray`
+
+    Requires numpy, which is imported on first call.
+
+    Args:
+        value (object): Any object that implements iteration on values
+        op (function): called with each key, in order (default: return value)
+        dtype (object): numeric numpy type of the result [float]
+
+    Returns:
+        numpy.ndarray: one dimensional array of results of op
+    """
+    import numpy
+
+    return numpy.fromiter(imap_values(value, op), dtype=dtype, count=len(value))
 
 
 def object_pairs_hook(*args, **kwargs):
     """Tries to use `Dict` if else uses `dict`
 
+    `dict` is used if any key matches an attribute of `Dict`. The
+    keys are checked in bulk after the `Dict` is constructed.
+
     Returns:
         object: `Dict` or `dict`
     """
+    res = Dict(*args, **kwargs)
+    if _reserved_names(Dict).isdisjoint(res):
+        return res
+    return dict(res)
+
+
+class _JSONStream(object):
+    """Buffered reader of JSON values for `json_iter_any`
+
+    Args:
+        obj (object): str or object with "read"
+        decoder (json.JSONDecoder): parses values
+
+    Attributes:
+        buf (str): unparsed text, which begins at `i`
+        eof (bool): obj has been read completely
+        i (int): current position in buf
+    """
+    def __init__(self, obj, decoder):
+        self.decoder = decoder
+        self.eof = not hasattr(obj, 'read')
+        self.buf = obj if self.eof else ''
+        self.i = 0
+        self.obj = obj
+        self.utf8 = None
+
+    def decode(self):
+        """Parse value after whitespace at `i`, reading more as needed
+
+        Returns:
+            object: parsed value
+        """
+        self.peek()
+        while True:
+            try:
+                res, e = self.decoder.raw_decode(self.buf, self.i)
+                if self.eof or not self._number_at_end(e):
+                    self.i = e
+                    return res
+            except ValueError as err:
+                if self.eof or not self._truncated(err):
+                    raise
+            self.read()
+
+    def peek(self):
+        """Skip whitespace
+
+        Returns:
+            str: next char or None at end of document
+        """
+        while True:
+            self.i = _JSON_WS_RE.match(self.buf, self.i).end()
+            if self.i < len(self.buf):
+                return self.buf[self.i]
+            if self.eof:
+                return None
+            self.read()
+
+    def read(self):
+        """Append next chunk to unparsed part of buf"""
+        # Read at least as much as is buffered so retries are amortized
+        c = self.obj.read(max(_JSON_ITER_CHUNK, len(self.buf) - self.i))
+        if not c:
+            self.eof = True
+        if isinstance(c, bytes):
+            if not self.utf8:
+                self.utf8 = codecs.getincrementaldecoder('utf-8')()
+            c = self.utf8.decode(c, final=self.eof)
+        self.buf = self.buf[self.i:] + c
+        self.i = 0
+
+    def _number_at_end(self, e):
+        """Could the token ending at `e` be a number continued in the next chunk?
+
+        True when the token ends with a number char (e.g. ``1``) and the
+        rest of buf could continue it (e.g. ``.``, ``5e``, or ``e-``).
+        ``true`` and ``false`` may cause an extra read, which is harmless.
+
+        Args:
+            e (int): end of parsed value
+
+        Returns:
+            bool: must read more before accepting
+        """
+        return self.buf[e - 1] in _JSON_NUMBER_CHARS \
+            and bool(_JSON_NUMBER_TAIL_RE.match(self.buf, e))
+
+    def _truncated(self, err):
+        """Could the decode error be caused by the end of buf?
+
+        True when the error is at the end of buf (e.g. ``[1,``) or the
+        rest of buf could be continued in the next chunk (e.g. ``"ab``,
+        ``tr``, or ``\\u00``). Otherwise, the input is malformed, and
+        the error is raised without reading the rest of the stream.
+
+        Args:
+            err (ValueError): raised by decoder
+
+        Returns:
+            bool: must read more before raising
+        """
+        p = getattr(err, 'pos', None)
+        if p is None:
+            # Python 2 does not report the position
+            return True
+        return p >= len(self.buf) or bool(_JSON_TRUNCATED_RE.match(self.buf, p))
+
+
+def _frozen(value):
+    """Raise on attempt to modify a `FrozenDict`"""
+    raise TypeError('{}: object is immutable'.format(type(value).__name__))
+
+
+def _reserved_names(cls):
+    """Attribute names of cls which may not be set as keys (cached)
+
+    Args:
+        cls (type): `Dict` or subclass
+
+    Returns:
+        frozenset: names of attributes
+    """
     try:
-        return Dict(*args, **kwargs)
-    except DictNameError:
-        return dict(*args, **kwargs)
+        return _reserved_names_cache[cls]
+    except KeyError:
+        res = _reserved_names_cache[cls] = frozenset(dir(cls))
+        return res
@@ -22,6 +22,28 @@ A param tuple contains three values:
 The returned ``cfg`` object is ready to use after the call. It will contain
 the config params as defined or an exception will be raised.
 
+Modules with many rarely used params can call `init_lazy` instead. Each
+value is resolved and parsed on first access and then memoized. Missing
+required values are only detected on access or by calling `validate`.
+
+Reloading
+---------
+
+Long running processes can call `reload` to pick up changes to
+base modules, home files, and the environment. The values are
+coalesced again and only the params whose inputs changed are
+reparsed. Modules which want to be notified register a callback
+on their ``cfg`` with `on_reload`::
+
+    def _cfg_reload(params, keys):
+        ...
+
+    pkconfig.on_reload(cfg, _cfg_reload)
+
+`reload`, `init`, and resolving lazy values are serialized by a lock so
+``reload(background=True)`` is safe while other threads initialize
+modules. Callbacks are called after the lock is released.
+
 Channel Files
 -------------
 
@@ -140,6 +162,22 @@ class as follows::
             },
         }
 
+Snapshots
+---------
+
+Coalescing imports every ``base_pkconfig``, executes every home file,
+and flattens `os.environ`. Short-lived processes can skip this work by
+setting ``$PYKERN_PKCONFIG_SNAPSHOT_DIR`` to a private, writable directory.
+Since snapshots are pickles, the directory and the snapshot file must be
+owned by the effective user and not writable by group or other, or the
+snapshot is neither read nor written.
+The coalesced values are pickled to a file in that directory, one per
+channel, load path, and current directory. The snapshot is used only if
+the environment and the size and mtime of every base and home file are
+unchanged. Values which cannot be pickled (e.g. ``sys.stdout``) disable the
+snapshot. Config files whose values depend on anything else (other
+files, the time, etc.) should not be used with snapshots.
+
 Summary
 -------
 
@@ -174,13 +212,25 @@ from __future__ import absolute_import, division, print_function
 
 # Import the minimum number of modules and none from pykern
 # pkconfig is the first module imported by all other modules in pykern
+import bisect
 import collections
 import copy
+import hashlib
 import importlib
 import inspect
 import os
 import re
+import string
 import sys
+import threading
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+try:
+    from importlib import reload as _module_reload
+except ImportError:
+    _module_reload = reload
 
 # These modules have very limited imports to avoid loops
 from pykern import pkcollections
@@ -205,6 +255,9 @@ LOAD_PATH_ENV_NAME = 'PYKERN_PKCONFIG_LOAD_PATH'
 #: Separater for load_path string
 LOAD_PATH_SEP = ':'
 
+#: Environment variable holding directory for coalesced value snapshots
+SNAPSHOT_DIR_ENV_NAME = 'PYKERN_PKCONFIG_SNAPSHOT_DIR'
+
 #: Root package implicit
 THIS_PACKAGE = 'pykern'
 
@@ -232,9 +285,39 @@ _load_path = LOAD_PATH_DEFAULT
 #: All values in _load_path coalesced
 _raw_values = None
 
+#: Sorted keys of _raw_values for prefix lookups (see `_raw_keys_with_prefix`)
+_raw_keys = None
+
 #: All values parsed via init() and os.environ that don't match loadpath
 _parsed_values = None
 
+#: Declared values which have not been resolved yet (see `_LazyValue`)
+_lazy_values = {}
+
+#: Keys being resolved, outermost first, for reporting cycles (see `_interpolate`)
+_resolve_chain = []
+
+#: Parses and formats ``{name}`` references in values
+_formatter = string.Formatter()
+
+#: Format string to names it references (see `_format_refs`)
+_format_refs_cache = {}
+
+#: Raw values by key with references interpolated (see `_interpolate`)
+_interpolated = {}
+
+#: Splits the name from attribute or index in a format field
+_FORMAT_FIELD_RE = re.compile(r'[.\[]')
+
+#: All declarations by `_Key` in the order they were declared
+_declarations = collections.OrderedDict()
+
+#: List of (params, callback) registered by `on_reload`
+_reload_callbacks = []
+
+#: Serializes coalescing, resolving values, and `reload` (reentrant for parsers)
+_lock = threading.RLock()
+
 #: String types, because we can't import modules (e.g. six)
 try:
     _string_types = (basestring,)
@@ -335,30 +418,37 @@ def init(**kwargs):
     Returns:
         Params: `pkcollections.OrderedMapping` populated with param values
     """
-    if '_caller_module' in kwargs:
-        # Internal use only: _values() calls init() to initialize pkconfig.cfg
-        m = kwargs['_caller_module']
-        del kwargs['_caller_module']
-    else:
-        if pkinspect.is_caller_main():
-            print(
-                'pkconfig.init() called from __main__; cannot configure, ignoring',
-                file=sys.stderr)
-            return None
-        m = pkinspect.caller_module()
-    assert pkinspect.root_package(m) in _load_path, \
-        '{}: module root not in load_path ({})'.format(m.__name__, _load_path)
-    mnp = m.__name__.split('.')
-    for k in reversed(mnp):
-        kwargs = {k: kwargs}
-    decls = {}
-    _flatten_keys([], kwargs, decls)
-    _coalesce_values()
-    res = pkcollections.OrderedMapping()
-    _iter_decls(decls, res)
-    for k in mnp:
-        res = res[k]
-    return res
+    return _init(kwargs, lazy=False)
+
+
+def init_lazy(**kwargs):
+    """Declares config params for calling module, resolving each on first access
+
+    Values are resolved and parsed the first time they are read
+    and then memoized. Call `validate` to check required values.
+
+    Args:
+        kwargs (dict): param name to (default, parser, docstring)
+
+    Returns:
+        Params: `pkcollections.OrderedMapping` which resolves values on access
+    """
+    return _init(kwargs, lazy=True)
+
+
+def on_reload(params, callback):
+    """Calls callback when `reload` changes values in params
+
+    The callback is passed the params and the list of keys
+    (e.g. ``pykern.pkdebug.control``) whose values changed.
+
+    Args:
+        params (OrderedMapping): module config returned by `init`
+        callback (callable): called with (params, keys)
+    """
+    assert callable(callback), \
+        '{}: callback must be callable'.format(callback)
+    _reload_callbacks.append((params, callback))
 
 
 def parse_none(func):
@@ -374,6 +464,35 @@ def parse_none(func):
     return func
 
 
+def reload(background=False):
+    """Coalesce values again and reparse params whose inputs changed
+
+    Base modules are reloaded, home files are run, and the
+    environment is read again. Params whose values change are
+    updated in place and callbacks registered with `on_reload`
+    are notified.
+
+    Args:
+        background (bool): reload in a daemon thread [False]
+
+    Returns:
+        object: list of changed keys or `threading.Thread` if background
+    """
+    if background:
+        res = threading.Thread(target=reload, name='pkconfig-reload')
+        res.daemon = True
+        res.start()
+        return res
+    with _lock:
+        res = _reload()
+    # Callbacks may call init or access lazy values from other threads
+    for params, callback in list(_reload_callbacks):
+        keys = [k.msg for k in res if getattr(_declarations[k], 'cfg', None) is params]
+        if keys:
+            callback(params, keys)
+    return [k.msg for k in res]
+
+
 def reset_state_for_testing():
     """Clear the raw values so we can change load paths dynamically
 
@@ -381,6 +500,23 @@ def reset_state_for_testing():
     """
     global _raw_values
     _raw_values = None
+    _declarations.clear()
+    del _reload_callbacks[:]
+
+
+def validate(params):
+    """Resolves all values in params, e.g. returned by `init_lazy`
+
+    Raises the same errors `init` would for missing required or
+    unparseable values.
+
+    Args:
+        params (OrderedMapping): configuration to resolve
+    """
+    for k in params:
+        v = params[k]
+        if isinstance(v, pkcollections.OrderedMapping):
+            validate(v)
 
 
 class _Declaration(object):
@@ -432,6 +568,66 @@ class _Key(str, object):
         return self
 
 
+class _LazyParams(pkcollections.OrderedMapping):
+    """OrderedMapping which resolves `_LazyValue` on first access
+
+    Accessing ``__dict__`` (e.g. `vars` and ``==``) resolves all
+    values so placeholders are never visible.
+    """
+    def __getattribute__(self, name):
+        res = super(_LazyParams, self).__getattribute__(name)
+        if isinstance(res, _LazyValue):
+            res = res.resolve()
+            setattr(self, name, res)
+        elif name == '__dict__':
+            for k, v in list(res.items()):
+                if isinstance(v, _LazyValue):
+                    res[k] = v.resolve()
+        return res
+
+
+class _LazyValue(object):
+    """Placeholder for a declared value which has not been resolved yet
+
+    `init` resolves placeholders right after declaring all values, and
+    `init_lazy` on access. References resolve placeholders on demand.
+
+    Args:
+        key (_Key): name of value
+        decl (_Declaration): how to resolve value
+    """
+    def __init__(self, key, decl):
+        self.key = key
+        self.decl = decl
+        self.resolved = False
+        self.value = None
+
+    def resolve(self, chain=None):
+        """Resolves and parses the value and records it in `_parsed_values`
+
+        Args:
+            chain (list): names being interpolated which refer to this value
+
+        Returns:
+            object: parsed value
+        """
+        global _resolve_chain
+
+        if not self.resolved:
+            with _lock:
+                if not self.resolved:
+                    _lazy_values.pop(self.key, None)
+                    prev = _resolve_chain
+                    _resolve_chain = (chain or []) + [self.key]
+                    try:
+                        self.value = _resolver(self.decl)(self.key, self.decl)
+                    finally:
+                        _resolve_chain = prev
+                    _parsed_values[self.key] = self.value
+                    self.resolved = True
+        return self.value
+
+
 def _clean_environ():
     """Ensure os.environ keys are valid (no bash function names)
 
@@ -450,12 +646,14 @@ def _coalesce_values():
     """Coalesce config files loaded from `cfg.load_path`
 
     Sets up load_path and channel then reads in base modules
-    and home files. Finally imports os.environ.
+    and home files. Finally imports os.environ. Callers other
+    than tests hold `_lock`.
 
     Returns:
         dict: nested values, top level is packages in load_path
     """
     global _raw_values
+    global _raw_keys
     global cfg
     if _raw_values:
         return _raw_values
@@ -472,28 +670,34 @@ def _coalesce_values():
     assert channel in VALID_CHANNELS, \
         '{}: invalid ${}; must be {}'.format(
             channel, CHANNEL_ENV_NAME, VALID_CHANNELS)
-    values = {}
-    for p in _load_path:
-        try:
-            # base_pkconfig used to be required, import if available
-            m = importlib.import_module(BASE_MODULE.format(p))
-            _values_flatten(values, getattr(m, channel)())
-        except ImportError:
-            pass
-    for p in _load_path:
-        fname = os.path.expanduser(HOME_FILE.format(p))
-        # The module itself may throw an exception so can't use try, because
-        # interpretation of the exception doesn't make sense. It would be
-        # better if run_path() returned a special exception when the file
-        # does not exist.
-        if os.path.isfile(fname):
-            m = pkrunpy.run_path_as_module(fname)
-            _values_flatten(values, getattr(m, channel)())
     env = _clean_environ()
-    _values_flatten(values, env)
-    values[CHANNEL_ENV_NAME] = channel
-    values[LOAD_PATH_ENV_NAME] = list(_load_path)
+    snapshot = _snapshot_key(channel, env)
+    values = _snapshot_load(snapshot)
+    if values is None:
+        values = {}
+        for p in _load_path:
+            try:
+                # base_pkconfig used to be required, import if available
+                m = importlib.import_module(BASE_MODULE.format(p))
+                _values_flatten(values, getattr(m, channel)())
+            except ImportError:
+                pass
+        for p in _load_path:
+            fname = os.path.expanduser(HOME_FILE.format(p))
+            # The module itself may throw an exception so can't use try, because
+            # interpretation of the exception doesn't make sense. It would be
+            # better if run_path() returned a special exception when the file
+            # does not exist.
+            if os.path.isfile(fname):
+                m = pkrunpy.run_path_as_module(fname)
+                _values_flatten(values, getattr(m, channel)())
+        _values_flatten(values, env)
+        values[CHANNEL_ENV_NAME] = channel
+        values[LOAD_PATH_ENV_NAME] = list(_load_path)
+        _snapshot_save(snapshot, values)
     _raw_values = values
+    _raw_keys = sorted(values.keys())
+    _interpolated.clear()
     _init_parsed_values(env)
     cfg = init(
         _caller_module=sys.modules[__name__],
@@ -525,41 +729,230 @@ def _flatten_keys(key_parts, values, res):
             res[k] = v
 
 
+def _format_refs(value):
+    """Names referenced by format string (cached)
+
+    Args:
+        value (str): format string
+
+    Returns:
+        tuple: names in value (e.g. ``FOO`` in ``{FOO.bar}``)
+    """
+    try:
+        return _format_refs_cache[value]
+    except KeyError:
+        pass
+    res = []
+    for _, f, _, _ in _formatter.parse(value):
+        if f:
+            f = _FORMAT_FIELD_RE.split(f, 1)[0]
+            if f not in res:
+                res.append(f)
+    res = _format_refs_cache[value] = tuple(res)
+    return res
+
+
+def _init(kwargs, lazy):
+    """Implements `init` and `init_lazy`
+
+    Args:
+        kwargs (dict): param name to (default, parser, docstring)
+        lazy (bool): resolve values on first access
+
+    Returns:
+        Params: `pkcollections.OrderedMapping` for the calling module
+    """
+    if '_caller_module' in kwargs:
+        # Internal use only: _values() calls init() to initialize pkconfig.cfg
+        m = kwargs['_caller_module']
+        del kwargs['_caller_module']
+    else:
+        if pkinspect.is_caller_main():
+            print(
+                'pkconfig.init() called from __main__; cannot configure, ignoring',
+                file=sys.stderr)
+            return None
+        m = pkinspect.caller_module()
+    assert pkinspect.root_package(m) in _load_path, \
+        '{}: module root not in load_path ({})'.format(m.__name__, _load_path)
+    mnp = m.__name__.split('.')
+    for k in reversed(mnp):
+        kwargs = {k: kwargs}
+    decls = {}
+    _flatten_keys([], kwargs, decls)
+    res = _LazyParams() if lazy else pkcollections.OrderedMapping()
+    with _lock:
+        _coalesce_values()
+        _iter_decls(decls, res)
+        for k in mnp:
+            res = res[k]
+        for k in decls:
+            if k in _declarations:
+                _declarations[k].cfg = res
+    return res
+
+
 def _init_parsed_values(env):
     """Removes any values that match load_path from env
 
     Args:
         env (dict): cleaned os.environ
     """
-    global _parsed_values
+    global _parsed_values, _lazy_values
     _parsed_values = {}
+    _lazy_values = {}
     r = re.compile('^(' + '|'.join(_load_path) + ')_$', flags=re.IGNORECASE)
     for k in env:
         if not r.search(k):
             _parsed_values[_Key([k])] = env[k]
 
 
+def _interpolate(value, chain):
+    """Formats references in value, resolving them first
+
+    References to declared params use their parsed values, which are
+    resolved first if need be (defaults included). Other references
+    are to `_raw_values`, which are interpolated recursively (depth
+    first, i.e. in topological order) and cached.
+
+    Args:
+        value (str): format string
+        chain (list): names being interpolated for cycle reporting
+
+    Returns:
+        str: formatted value
+    """
+    values = {}
+    for n in _format_refs(value):
+        assert n not in chain, \
+            '{}: format reference cycle'.format(' -> '.join(chain + [n]))
+        if n in _lazy_values:
+            values[n] = _lazy_values[n].resolve(chain)
+        elif n in _declarations and n in _parsed_values:
+            values[n] = _parsed_values[n]
+        elif n in _interpolated:
+            values[n] = _interpolated[n]
+        elif n in _raw_values:
+            v = _raw_values[n]
+            if isinstance(v, _string_types) and not isinstance(v, Verbatim):
+                v = _interpolate(v, chain + [n])
+            values[n] = _interpolated[n] = v
+    return value.format(**values)
+
+
 def _iter_decls(decls, res):
     """Iterates decls and resolves values into res
 
+    All values are declared as `_LazyValue` placeholders before any
+    are resolved so references to values declared later (sorted
+    order) resolve on demand. If res is a `_LazyParams`, groups are
+    `_LazyParams`, and placeholders are resolved on access.
+
     Args:
         decls (dict): nested dictionary of a module's cfg values
         res (OrderedMapping): result configuration for module
     """
+    t = type(res)
+    pending = []
     for k in sorted(decls.keys()):
         #TODO(robnagler) deal with keys with '.' in them (not possible?)
         d = _Declaration(decls[k])
         r = res
         for kp in k.parts[:-1]:
             if kp not in r:
-                r[kp] = pkcollections.OrderedMapping()
+                r[kp] = t()
             r = r[kp]
         kp = k.parts[-1]
         if d.group:
-            r[kp] = pkcollections.OrderedMapping()
+            r[kp] = t()
+            continue
+        d.params = r
+        d.param = kp
+        _declarations[k] = d
+        v = r[kp] = _lazy_values[k] = _LazyValue(k, d)
+        pending.append(v)
+    if t is _LazyParams:
+        return
+    for v in pending:
+        v.decl.params[v.decl.param] = v.resolve()
+
+
+def _reload():
+    """Implements `reload`, called with `_lock` held
+
+    Returns:
+        list: `_Key` of values which changed
+    """
+    global _raw_values
+    prev_raw = _raw_values or {}
+    prev_parsed = _parsed_values or {}
+    prev_lazy = _lazy_values
+    for p in _load_path:
+        m = sys.modules.get(BASE_MODULE.format(p))
+        if m:
+            _module_reload(m)
+    _raw_values = None
+    _coalesce_values()
+    # Unresolved lazy values will resolve with the new raw values
+    for k, v in prev_lazy.items():
+        if not v.resolved:
+            _lazy_values[k] = v
+    inputs = set(
+        k for k in set(prev_raw) | set(_raw_values)
+        if k not in prev_raw or k not in _raw_values
+        or prev_raw[k] != _raw_values[k]
+    )
+    for k in _declarations:
+        if k in prev_parsed and k not in _lazy_values:
+            _parsed_values[k] = prev_parsed[k]
+    res = []
+    for k, d in _declarations.items():
+        if k in _lazy_values or not _reload_inputs_changed(k, d, inputs):
             continue
-        r[kp] = _resolver(d)(k, d)
-        _parsed_values[k] = r[kp]
+        v = _resolver(d)(k, d)
+        _parsed_values[k] = v
+        if k in prev_parsed and v == prev_parsed[k]:
+            continue
+        setattr(d.params, d.param, v)
+        res.append(k)
+    return res
+
+
+def _reload_inputs_changed(key, decl, inputs):
+    """Did the raw values used by the declaration change?
+
+    Follows format references (see `_format_refs`) transitively.
+
+    Args:
+        key (_Key): name of declaration
+        decl (_Declaration): how value is resolved
+        inputs (set): raw keys which were added, removed, or changed
+
+    Returns:
+        bool: True if value should be reparsed
+    """
+    if key in inputs:
+        return True
+    if _resolver(decl) == _resolve_dict:
+        p = key + '_'
+        return any(k.startswith(p) for k in inputs)
+    seen = set([key])
+    values = [_raw_values.get(key, decl.default)]
+    while values:
+        v = values.pop()
+        if not isinstance(v, _string_types) or isinstance(v, Verbatim):
+            continue
+        for n in _format_refs(v):
+            if n in seen:
+                continue
+            if n in inputs:
+                return True
+            seen.add(n)
+            if n in _raw_values:
+                values.append(_raw_values[n])
+            elif n in _declarations:
+                values.append(_declarations[n].default)
+    return False
 
 
 def _resolver(decl):
@@ -585,9 +978,7 @@ def _resolve_dict(key, decl):
     assert isinstance(res, (dict, pkcollections.OrderedMapping)), \
         '{}: default ({}) must be a dict'.format(key.msg, decl.default)
     key_prefix = key + '_'
-    for k in reversed(sorted(_raw_values.keys())):
-        if k != key and not k.startswith(key_prefix):
-            continue
+    for k in _raw_keys_with_prefix(key):
         r = res
         if len(k.parts) == 1:
             # os.environ has only one part (no way to split on '.')
@@ -609,6 +1000,30 @@ def _resolve_dict(key, decl):
     return res
 
 
+def _raw_keys_with_prefix(key):
+    """Keys of `_raw_values` equal to `key` or beginning with ``key_``
+
+    Uses `bisect` on `_raw_keys`, since the keys beginning
+    with ``key_`` are contiguous in sorted order.
+
+    Args:
+        key (_Key): prefix
+
+    Returns:
+        list: matching keys in reverse sorted order
+    """
+    p = key + '_'
+    res = _raw_keys[
+        bisect.bisect_left(_raw_keys, p):
+        # '`' is the character after '_'
+        bisect.bisect_left(_raw_keys, key + '`')
+    ]
+    res.reverse()
+    if key in _raw_values:
+        res.append(key)
+    return res
+
+
 def _resolve_list(key, decl):
     #TODO(robnagler) assert required
     res = copy.deepcopy(decl.default) if decl.default else []
@@ -633,12 +1048,8 @@ def _resolve_value(key, decl):
         assert not decl.required, \
             '{}: config value missing and is required'.format(key.msg)
         res = decl.default
-    seen = {}
-    while isinstance(res, _string_types) \
-        and not isinstance(res, Verbatim) \
-        and not res in seen:
-        seen[res] = 1
-        res = res.format(**_parsed_values)
+    if isinstance(res, _string_types) and not isinstance(res, Verbatim):
+        res = _interpolate(res, _resolve_chain or [key])
     #TODO(robnagler) FOO_BAR='' will not be evaluated. It may need to be
     # if None is not a valid option and there is a default
     if res is None and not hasattr(decl.parser, _PARSE_NONE_ATTR):
@@ -662,6 +1073,126 @@ def _load_path_parser(value):
     return value[:]
 
 
+def _snapshot_key(channel, env):
+    """Compute snapshot file and validation key
+
+    Args:
+        channel (str): current channel
+        env (dict): cleaned os.environ
+
+    Returns:
+        tuple: (path, key) or None if snapshots are not configured
+    """
+    d = os.getenv(SNAPSHOT_DIR_ENV_NAME)
+    if not d:
+        return None
+    sources = []
+    for p in _load_path:
+        fname = None
+        try:
+            fname = os.path.join(
+                os.path.dirname(importlib.import_module(p).__file__),
+                'base_pkconfig.py',
+            )
+        except ImportError:
+            pass
+        for f in fname, os.path.expanduser(HOME_FILE.format(p)):
+            try:
+                s = os.stat(f)
+                sources.append((f, s.st_mtime, s.st_size))
+            except (OSError, TypeError):
+                sources.append((f, None))
+    name = hashlib.sha1(
+        repr((channel, _load_path, os.getcwd())).encode('utf-8'),
+    ).hexdigest()
+    key = repr((sys.version, sources, sorted(env.items())))
+    return (
+        os.path.join(d, 'pkconfig-{}.pickle'.format(name)),
+        hashlib.sha1(key.encode('utf-8')).hexdigest(),
+    )
+
+
+def _snapshot_load(snapshot):
+    """Load coalesced values if snapshot is valid
+
+    Args:
+        snapshot (tuple): from `_snapshot_key`
+
+    Returns:
+        dict: raw values or None if not configured or invalid
+    """
+    if not snapshot:
+        return None
+    path, key = snapshot
+    try:
+        if not _snapshot_private(os.stat(os.path.dirname(path))):
+            return None
+        with open(path, 'rb') as f:
+            # fstat so the checked file is the file which is unpickled
+            if not _snapshot_private(os.fstat(f.fileno())):
+                return None
+            k, items = pickle.load(f)
+    except Exception:
+        return None
+    if k != key:
+        return None
+    res = {}
+    for parts, k, v in items:
+        res[_Key(parts) if parts else k] = v
+    return res
+
+
+def _snapshot_private(stat):
+    """Is the file only writable by the effective user?
+
+    Snapshots are pickles so loading a file written by another user
+    would run their code.
+
+    Args:
+        stat (os.stat_result): of snapshot dir or file
+
+    Returns:
+        bool: True if owned by euid and not group or other writable
+    """
+    if not hasattr(os, 'geteuid'):
+        return False
+    return stat.st_uid == os.geteuid() and not stat.st_mode & 0o022
+
+
+def _snapshot_save(snapshot, values):
+    """Write values atomically, ignoring errors (e.g. unpicklable values)
+
+    Args:
+        snapshot (tuple): from `_snapshot_key`
+        values (dict): coalesced raw values
+    """
+    if not snapshot:
+        return
+    path, key = snapshot
+    try:
+        if not _snapshot_private(os.stat(os.path.dirname(path))):
+            return
+    except Exception:
+        return
+    # _Key cannot be pickled, because str value is computed from parts
+    items = [
+        (getattr(k, 'parts', None), str(k), values[k]) for k in values
+    ]
+    tmp = '{}-{}'.format(path, os.getpid())
+    try:
+        with os.fdopen(
+            os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600),
+            'wb',
+        ) as f:
+            pickle.dump((key, items), f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except Exception:
+            pass
+
+
 def _values_flatten(base, new):
     new_values = {}
     _flatten_keys([], new, new_values)
@@ -54,8 +54,45 @@ Example:
     You can match any text in the line output with a regular expression, which
     is case insensitive.
 
+    Each `pkdc` call site caches whether its location (file:line:func)
+    alone decides the match. If the location matches, the message is
+    not searched. If the control is anchored with ``^`` and its leading
+    literal text cannot match the location, the call returns after a
+    single dict lookup::
+
+        PYKERN_PKDEBUG_CONTROL='^my_mod.py:52:'
+
 If `output` is a string, will open the file to write to. The initial
-value of output is ``$PYKERN_PKDEBUG_OUTPUT``.
+value of output is ``$PYKERN_PKDEBUG_OUTPUT``. The file is opened with
+``O_APPEND`` and each message (or batch) is written with a single
+`os.write` so lines from multiple processes are not torn. The file is
+reopened in a forked child. If `reopen_on_sighup` is set, a ``SIGHUP``
+handler is installed which reopens the file (log rotation). The handler
+replaces the default disposition (exit) of ``SIGHUP`` so it is off by
+default.
+
+If `async_output` is set, messages are queued and written in batches
+by a background thread so slow outputs do not stall the caller. The queue
+holds at most `async_queue_size` messages. When it is full,
+`async_overflow` decides whether the caller blocks (``block``), the
+oldest queued message is discarded (``drop_oldest``), or the new message
+is discarded (``drop_newest``). Dropped messages are counted and reported
+in the output. The queue is flushed at exit and before `os.fork`.
+
+If `format` is ``jsonl``, each message is written as one JSON object
+per line with the fields ``file``, ``line``, ``func``, ``pid``,
+``thread``, ``time`` (UTC), ``fmt``, ``args``, and ``kwargs``. The
+message is not formatted with :func:`str.format` unless `pkdc` needs
+it to match `control`. Values which are not JSON types are written as
+their `str`.
+
+Noisy call sites can be limited with `rate_limit` (maximum messages per
+second from one call site, e.g. ``$PYKERN_PKDEBUG_RATE_LIMIT``) and
+`sample_rate` (fraction of messages written). Suppressed messages are
+counted per site and reported in a summary line (a JSON object if
+`format` is ``jsonl``) `rate_limit_summary` seconds after the first
+suppressed message and at exit. The check is done before the message is
+formatted and, except for `pkdc`, before the caller's location is found.
 
 :copyright: Copyright (c) 2014-2016 RadiaSoft LLC.  All Rights Reserved.
 :license: http://www.apache.org/licenses/LICENSE-2.0.html
@@ -63,26 +100,51 @@ value of output is ``$PYKERN_PKDEBUG_OUTPUT``.
 from __future__ import absolute_import, division, print_function
 from pykern import pkconfig
 from pykern import pkinspect
+import atexit
+import collections
 import datetime
 import inspect
+import json
 import logging
 import os
+import random
 import re
+import signal
 import six
 import sys
 import threading
+import time
 import traceback
+import weakref
 
 
 #: Maximum number of exceptions thrown before printing stops
 MAX_EXCEPTION_COUNT = 5
 
+#: Valid values for `async_overflow`
+ASYNC_OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+#: Valid values for `format`
+FORMATS = ('text', 'jsonl')
+
 #: Was control initialized?
 _have_control = False
 
 #: Object which does the writing, initialized every time :func:`init` is called.
 _printer = None
 
+#: Arguments to last :func:`init`, which override `cfg` after `pkconfig.reload`
+_init_kwargs = {}
+
+#: Incremented by SIGHUP so `_AppendFile` knows to reopen
+_sighup_generation = 0
+
+#: Was the SIGHUP handler installed?
+_sighup_installed = False
+
+#: Handler replaced by `_sighup_handler`
+_sighup_prev = None
+
 #: Get IPython InteractiveShell.write()
 # See https://github.com/ipython/ipython/blob/master/IPython/core/interactiveshell.py)
 _ipython_write = None
@@ -97,6 +159,15 @@ _RE_TYPE = type(re.compile(''))
 #: How to parse thread names
 _THREAD_ID_RE = re.compile(r'Thread-(\d+)', re.IGNORECASE)
 
+#: Characters which end the literal text of an anchored control
+_CONTROL_META = '.^$*+?{}[]()|'
+
+#: Quantifiers which make the preceding character optional
+_CONTROL_OPTIONAL = '*?{'
+
+#: Seconds between checks that the async writer is alive while flushing
+_ASYNC_FLUSH_POLL = 0.1
+
 
 def init(**kwargs):
     """May be called to (re)initialize this module.
@@ -109,13 +180,27 @@ def init(**kwargs):
     case it is opened with :func:`io.open`.
 
     Args:
+        async_output (bool): write messages in a background thread [False]
+        async_overflow (str): block, drop_oldest, or drop_newest [block]
+        async_queue_size (int): maximum messages queued [1000]
         control(str or re.RegexObject): lines matching will be output
+        format (str): text or jsonl [text]
         output (str or file): where to write messages [error output]
+        rate_limit (int): maximum messages per second per call site [0, unlimited]
+        rate_limit_summary (int): seconds between suppressed message reports [60]
         redirect_logging (bool): Redirect Python's logging to output [True]
+        reopen_on_sighup (bool): reopen `output` file on SIGHUP [False]
+        sample_rate (float): fraction of messages written per call site [1.0]
         want_pid_time (bool): display PID and time in messages [False]
     """
     global _printer
     global _have_control
+    global _init_kwargs
+    _init_kwargs = kwargs
+    if _printer:
+        _printer._suppressed_flush()
+        if _printer.async_writer:
+            _printer.async_writer.close()
     _printer = _Printer(**kwargs)
     _have_control = _printer.have_control
 
@@ -133,7 +218,14 @@ def pkdc(fmt, *args, **kwargs):
     # Since calls are left in for product, this check has
     # some value.
     if _have_control:
-        _printer._write(fmt, args, kwargs, with_control=True)
+        f = inspect.currentframe().f_back
+        try:
+            site = (f.f_code, f.f_lineno)
+            # Sites which can never match return after one lookup
+            if _printer.control_sites.get(site) is not False:
+                _printer._write(fmt, args, kwargs, with_control=True, frame=f, site=site)
+        finally:
+            del f
 
 
 def pkdexc():
@@ -238,6 +330,163 @@ def pkdpretty(obj):
     return obj
 
 
+class _AppendFile(object):
+    """Multi-process safe, line-atomic file output
+
+    Opened with ``O_APPEND`` so writes from multiple processes are
+    appended atomically. Each call to `write` is a single `os.write`.
+    The file is reopened when the pid changes (fork) or after ``SIGHUP``
+    (see `reopen_on_sighup`).
+
+    Args:
+        path (str): file to append to
+    """
+    def __init__(self, path):
+        self.path = str(path)
+        self.fd = None
+        self._open()
+
+    def __del__(self):
+        try:
+            os.close(self.fd)
+        except Exception:
+            pass
+
+    def write(self, msg):
+        """Append `msg` to file
+
+        Args:
+            msg (str): what to write
+        """
+        if self.pid != os.getpid() or self.generation != _sighup_generation:
+            self._open()
+        if not isinstance(msg, bytes):
+            msg = msg.encode('utf-8')
+        while msg:
+            msg = msg[os.write(self.fd, msg):]
+
+    def _open(self):
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+        prev = self.fd
+        self.fd = fd
+        self.pid = os.getpid()
+        self.generation = _sighup_generation
+        if prev is not None:
+            try:
+                os.close(prev)
+            except OSError:
+                pass
+
+
+class _AsyncWriter(object):
+    """Writes messages in batches from a background thread
+
+    Messages are appended to a bounded queue. A daemon thread drains
+    the whole queue and writes it with a single call. If the process
+    forks, the child discards the parent's queue and starts its own thread.
+
+    Args:
+        write (callable): writes a str synchronously
+        size (int): maximum number of queued messages
+        overflow (str): what to do when queue is full (see `ASYNC_OVERFLOW_POLICIES`)
+        dropped (callable): returns message (str) reporting number of dropped messages
+
+    Attributes:
+        drop_count (int): total messages dropped due to overflow
+    """
+    def __init__(self, write, size, overflow, dropped):
+        assert size > 0, \
+            '{}: async_queue_size must be positive'.format(size)
+        self.write = write
+        self.dropped = dropped
+        self.size = size
+        self.overflow = _cfg_async_overflow(overflow)
+        self.drop_count = 0
+        self._closed = False
+        self._start()
+
+    def close(self):
+        """Flush queue and stop the thread
+
+        Messages put after close are written synchronously.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.flush()
+
+    def flush(self):
+        """Waits until all queued messages are written"""
+        if self._pid != os.getpid():
+            return
+        with self._cond:
+            while (self._queue or self._busy) and self._thread.is_alive():
+                self._cond.wait(_ASYNC_FLUSH_POLL)
+
+    def put(self, msg):
+        """Queue `msg` applying the overflow policy
+
+        Args:
+            msg (str): what to write
+        """
+        if self._pid != os.getpid():
+            self._start()
+        with self._cond:
+            if self._closed:
+                self.write(msg)
+                return
+            if len(self._queue) >= self.size:
+                if self.overflow == 'drop_newest':
+                    self._drop()
+                    return
+                if self.overflow == 'drop_oldest':
+                    self._queue.popleft()
+                    self._drop()
+                else:
+                    while len(self._queue) >= self.size and self._thread.is_alive():
+                        self._cond.wait(_ASYNC_FLUSH_POLL)
+            self._queue.append(msg)
+            self._cond.notify_all()
+
+    def _drop(self):
+        self.drop_count += 1
+        self._unreported_drops += 1
+
+    def _run(self):
+        """Drain queue until closed"""
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                batch = list(self._queue)
+                self._queue.clear()
+                d = self._unreported_drops
+                self._unreported_drops = 0
+                self._busy = True
+                self._cond.notify_all()
+            try:
+                if d:
+                    batch.append(self.dropped(d))
+                self.write(''.join(batch))
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _start(self):
+        """Initialize queue and thread (again after fork)"""
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._queue = collections.deque()
+        self._unreported_drops = 0
+        self._busy = False
+        self._thread = threading.Thread(target=self._run, name='pkdebug-async')
+        self._thread.daemon = True
+        self._thread.start()
+
+
 class _LoggingHandler(logging.Handler):
     """Handler added to root logger.
 
@@ -255,13 +504,19 @@ class _LoggingHandler(logging.Handler):
             return '{}:{}:{}'.format(record.levelname, record.name, record.getMessage())
 
         def pid_time():
-            return (record.process, datetime.datetime.utcfromtimestamp(record.created))
+            return (record.process, record.created)
 
         def prefix():
-            return pkinspect.Call(record)
+            return pkinspect.Location(record)
+
+        def values():
+            return ('{}:{}:{}', [record.levelname, record.name, record.getMessage()], {})
 
         wc = record.levelno < logging.INFO
-        _printer._process(prefix, msg, pid_time, with_control=wc)
+        _printer._process(
+            prefix, msg, values, pid_time, with_control=wc,
+            site=(record.pathname, record.lineno),
+        )
 
 
 class _Printer(object):
@@ -274,18 +529,71 @@ class _Printer(object):
         for k in cfg:
             setattr(self, k, cfg[k])
         self.logging_handler = None
+        self.control_sites = _SiteMap()
+        self.async_writer = None
+        # (second, formatted) so a single assignment updates both
+        self.pid_time_second = (None, None)
+        self.thread_local = threading.local()
+        self.rate_limited = False
+        self.rate_sites = _SiteMap()
+        self.suppressed = _SiteMap()
+        self.suppressed_lock = threading.Lock()
+        self.suppressed_timer = None
         try:
             self.want_pid_time = self._init_want_pid_time(kwargs)
+            self.rate_limited = self._init_rate_limit(kwargs)
             self.output = self._init_output(kwargs)
+            self.format = self._init_format(kwargs)
+            self.async_writer = self._init_async_writer(kwargs)
             self.redirect_logging = self._init_redirect_logging(kwargs)
+            self.reopen_on_sighup = self._init_reopen_on_sighup(kwargs)
             self.control = self._init_control(kwargs)
             self.have_control = bool(self.control)
+            self.control_anchor = _control_anchor(self.control)
         except Exception:
             for k in cfg:
                 setattr(self, k, cfg[k])
+            self.have_control = bool(self.control)
+            self.control_anchor = None
+            if self.async_writer:
+                self.async_writer.close()
+            self.async_writer = None
+            self.rate_limited = False
             self._err('initialization failed, reverting values', pkdexc())
         self._logging_install()
 
+    def _control_site(self, site, prefix):
+        """Decides and caches whether `prefix` alone determines the match
+
+        A match which ends inside `prefix` cannot be affected by the
+        message so the site always matches. A control anchored at the
+        start whose literal text disagrees with `prefix` never matches.
+
+        Args:
+            site (tuple): (code, lineno) of the call or None
+            prefix (str): formatted location of the call
+
+        Returns:
+            bool: True (always matches), False (never), or None (search message)
+        """
+        if site is None:
+            return None
+        try:
+            return self.control_sites[site]
+        except KeyError:
+            pass
+        res = None
+        m = self.control.search(prefix)
+        if m and m.end() < len(prefix) and not _control_has_lookaround(self.control):
+            res = True
+        elif self.control_anchor is not None:
+            p = prefix.lower()
+            n = min(len(p), len(self.control_anchor))
+            if p[:n] != self.control_anchor[:n]:
+                res = False
+        self.control_sites[site] = res
+        return res
+
     def _err(self, msg, exc):
         """When a logging error occurs.
         """
@@ -310,6 +618,17 @@ class _Printer(object):
             return 'invalid format format={} args={} kwargs={}'.format(
                 fmt, args, kwargs)
 
+    def _init_async_writer(self, kwargs):
+        self.async_output = bool(kwargs.get('async_output', cfg.async_output))
+        if not self.async_output:
+            return None
+        return _AsyncWriter(
+            self._out_sync,
+            int(kwargs.get('async_queue_size', cfg.async_queue_size)),
+            kwargs.get('async_overflow', cfg.async_overflow),
+            lambda count: self._internal('dropped {} messages', count),
+        )
+
     def _init_control(self, kwargs):
         try:
             if 'control' in kwargs:
@@ -320,6 +639,9 @@ class _Printer(object):
         return cfg.control
 
 
+    def _init_format(self, kwargs):
+        return _cfg_format(kwargs.get('format', cfg.format))
+
     def _init_output(self, kwargs):
         try:
             if 'output' in kwargs:
@@ -329,12 +651,86 @@ class _Printer(object):
             self._err('output could not be opened, using safe value', pkdexc())
         return cfg.output
 
+    def _init_rate_limit(self, kwargs):
+        self.rate_limit = int(kwargs.get('rate_limit', cfg.rate_limit))
+        self.rate_limit_summary = int(
+            kwargs.get('rate_limit_summary', cfg.rate_limit_summary))
+        self.sample_rate = _cfg_sample_rate(
+            kwargs.get('sample_rate', cfg.sample_rate))
+        self.suppressed_next = time.time() + self.rate_limit_summary
+        return bool(self.rate_limit > 0 or self.sample_rate < 1.0)
+
     def _init_redirect_logging(self, kwargs):
         return bool(kwargs.get('redirect_logging', cfg.redirect_logging))
 
+    def _init_reopen_on_sighup(self, kwargs):
+        res = bool(kwargs.get('reopen_on_sighup', cfg.reopen_on_sighup))
+        if res:
+            _sighup_install()
+        return res
+
     def _init_want_pid_time(self, kwargs):
         return bool(kwargs.get('want_pid_time', cfg.want_pid_time))
 
+    def _internal(self, fmt, *args):
+        """Formats a message from this module in the active `format`
+
+        The location is the caller of this method.
+
+        Args:
+            fmt (str): how to :func:`str.format` (without module prefix)
+            args: what to format
+
+        Returns:
+            str: line terminated by a newline
+        """
+        fmt = 'pykern.pkdebug: ' + fmt
+        if self.format == 'jsonl':
+            return self._jsonl(
+                pkinspect.Location(inspect.currentframe().f_back),
+                (fmt, args, {}),
+                (os.getpid(), time.time()),
+            )
+        return fmt.format(*args) + '\n'
+
+    def _jsonl(self, call, values, pid_time):
+        """Creates a JSON line from the unformatted message
+
+        Values which cannot be encoded even with `str` (e.g. dicts with
+        tuple keys or circular references) are written as their `repr`
+        so one bad argument does not count as a logging error.
+
+        Args:
+            call (pkinspect.Location): where message was written
+            values (tuple): fmt, args, kwargs
+            pid_time (tuple): pid and time (seconds since epoch)
+
+        Returns:
+            str: JSON object terminated by a newline
+        """
+        fmt, args, kwargs = values
+        pid, t = pid_time
+        res = collections.OrderedDict((
+            ('file', call.filename),
+            ('line', call.lineno),
+            ('func', call.name),
+            ('pid', pid),
+            ('thread', self._thread_id()),
+            ('time', '{:%Y-%m-%dT%H:%M:%S.%f}Z'.format(
+                datetime.datetime.utcfromtimestamp(t))),
+            ('fmt', fmt),
+            ('args', list(args)),
+            ('kwargs', kwargs),
+        ))
+        try:
+            return json.dumps(res, default=str) + '\n'
+        except (TypeError, ValueError):
+            pass
+        res['fmt'] = _jsonl_value(fmt)
+        res['args'] = [_jsonl_value(v) for v in args]
+        res['kwargs'] = dict((k, _jsonl_value(v)) for k, v in kwargs.items())
+        return json.dumps(res, default=str) + '\n'
+
     def _logging_install(self):
         """Initialize logging based on redirect_logging
         """
@@ -382,6 +778,17 @@ class _Printer(object):
         self.logging_prev_level = None
 
     def _out(self, msg):
+        """Queues msg for the async writer or writes it directly
+
+        Args:
+            msg (str): what to write
+        """
+        if self.async_writer:
+            self.async_writer.put(msg)
+        else:
+            self._out_sync(msg)
+
+    def _out_sync(self, msg):
         """Writes msg to output (or error output if not output)
 
         If running in IPython, then use ``get_ipython().write_err()``
@@ -406,24 +813,30 @@ class _Printer(object):
             self.exception_count += 1
             sys.__stderr__.write(output)
 
-    def _pid_time(self, pid, time):
+    def _pid_time(self, pid, t):
         """Creates pid-time string for output
 
+        The time is only reformatted when the second changes.
+
         Args:
             pid (int): process id
-            time (datetime): when did it happen (UTC)
+            t (float): when did it happen (seconds since epoch)
 
         Returns:
             str: formatted
         """
-        if not self.want_pid_time:
-            return ''
         try:
+            s = int(t)
+            c = self.pid_time_second
+            if c[0] != s:
+                c = (s, '{:%b %d %H:%M:%S}'.format(
+                    datetime.datetime.utcfromtimestamp(s)))
+                self.pid_time_second = c
             # Force the thread id to a reasonable length so that
             # we don't clutter the logs. It can't be used for anything
             # other than identifying "in the small" log line relationships.
             i = self._thread_id() % 99991
-            return '{:%b %d %H:%M:%S} {:5d} {:5d} '.format(time, pid, i)
+            return '{} {:5d} {:5d} '.format(c[1], pid, i)
         except Exception:
             self.exception_count += 1
             self._err('error formatting pid and time', pkdexc())
@@ -439,47 +852,138 @@ class _Printer(object):
         """
         return '{} '.format(call)
 
-    def _process(self, call, message, pid_time_values, with_control):
+    def _process(self, call, message, values, pid_time_values, with_control, site=None):
         """Writes formatted message to output with location prefix.
 
         If not `with_control`, always writes message to
         :attr:`output`. If `with_control` and whole expression matches
         :attr:`control`, writes message, else nothing is output.
 
+        If :attr:`format` is ``jsonl``, `message` is only called when
+        needed to match :attr:`control`. Rate limits are applied before
+        `call` unless `with_control`, which must match first.
+
         Args:
             call (func): returns filename, line, funcname
             message (func): returns message with prefix as string
+            values (func): returns fmt, args, and kwargs
             pid_time_values (func): returns pid and time
             with_control (bool): respect :attr:`control`
+            site (tuple): key for :attr:`control_sites` [None]
         """
         if self.too_many_exceptions or with_control and not self.control:
             return
         try:
-            msg = self._prefix(call()) + message()
-            if not with_control or self.control.search(msg):
-                self._out(self._pid_time(*pid_time_values()) + msg.rstrip() + '\n')
+            if not with_control and self.rate_limited and not self._rate_ok(site):
+                return
+            c = call()
+            p = self._prefix(c)
+            msg = None
+            if with_control:
+                d = self._control_site(site, p)
+                if d is False:
+                    return
+                if not d:
+                    msg = p + message()
+                    if not self.control.search(msg):
+                        return
+                if self.rate_limited and not self._rate_ok(site):
+                    return
+            if self.format == 'jsonl':
+                self._out(self._jsonl(c, values(), pid_time_values()))
+                return
+            if msg is None:
+                msg = p + message()
+            if self.want_pid_time:
+                msg = self._pid_time(*pid_time_values()) + msg
+            self._out(msg.rstrip() + '\n')
         except Exception:
             self._err('unable to process message', pkdexc())
         finally:
             if self.exception_count >= MAX_EXCEPTION_COUNT:
                 self.too_many_exceptions = True
 
+    def _rate_ok(self, site):
+        """Applies `sample_rate` and `rate_limit` to call site
+
+        Counts suppressed messages and writes a summary when
+        :attr:`rate_limit_summary` seconds have passed.
+
+        Args:
+            site (tuple): (code or pathname, lineno)
+
+        Returns:
+            bool: True if message should be written
+        """
+        now = time.time()
+        res = True
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            res = False
+        elif self.rate_limit > 0:
+            s = int(now)
+            c = self.rate_sites.get(site)
+            if c is None or c[0] != s:
+                c = [s, 0]
+                self.rate_sites[site] = c
+            c[1] += 1
+            res = c[1] <= self.rate_limit
+        if not res:
+            with self.suppressed_lock:
+                self.suppressed[site] = self.suppressed.get(site, 0) + 1
+                if now < self.suppressed_next and not self.suppressed_timer:
+                    # Report even if the site stops writing
+                    t = threading.Timer(
+                        self.suppressed_next - now, self._suppressed_flush)
+                    t.daemon = True
+                    t.start()
+                    self.suppressed_timer = t
+        if now >= self.suppressed_next and self.suppressed:
+            self._suppressed_flush()
+        return res
+
+    def _suppressed_flush(self):
+        """Writes summary of suppressed messages, if any, and resets counts
+
+        Called from `_rate_ok`, the summary timer, `init`, and at exit.
+        """
+        with self.suppressed_lock:
+            x = self.suppressed
+            self.suppressed = _SiteMap()
+            self.suppressed_next = time.time() + self.rate_limit_summary
+            if self.suppressed_timer:
+                self.suppressed_timer.cancel()
+                self.suppressed_timer = None
+        if not x:
+            return
+        res = []
+        for k, v in sorted(x.items(), key=lambda i: _site_str(i[0])):
+            res.append(
+                self._internal('suppressed {} messages from {}', v, _site_str(k)))
+        self._out(''.join(res))
+
     def _thread_id(self):
         """Returns a number to identify the current thread
 
+        Computed once per thread and cached in :attr:`thread_local`.
+
         Returns:
             int: some number that uniquely identifies the thread
         """
+        try:
+            return self.thread_local.id
+        except AttributeError:
+            pass
         t = threading.current_thread()
         n = t.name
         if n == 'MainThread':
-            return 0
-        m = _THREAD_ID_RE.search(t.name)
-        if m:
-            return int(m.group(1))
-        return t.ident
-
-    def _write(self, fmt, args, kwargs, with_control=False):
+            res = 0
+        else:
+            m = _THREAD_ID_RE.search(t.name)
+            res = int(m.group(1)) if m else t.ident
+        self.thread_local.id = res
+        return res
+
+    def _write(self, fmt, args, kwargs, with_control=False, frame=None, site=None):
         """Provides formatter for message to _process
 
         Args:
@@ -487,7 +991,14 @@ class _Printer(object):
             args (list): what to format
             kwargs (dict): what to format
             with_control (bool): respect :attr:`control`
+            frame (frame): caller of pkdc or pkdp [caller's caller]
+            site (tuple): key for :attr:`control_sites` [None]
         """
+        if frame is None:
+            frame = inspect.currentframe().f_back.f_back
+        if site is None:
+            site = (frame.f_code, frame.f_lineno)
+
         def msg():
             try:
                 return self._format(fmt, args, kwargs)
@@ -497,12 +1008,113 @@ class _Printer(object):
                     fmt, args, kwargs)
 
         def pid_time():
-            return (os.getpid(), datetime.datetime.utcnow())
+            return (os.getpid(), time.time())
 
         def prefix():
-            return pkinspect.Call(inspect.currentframe().f_back.f_back.f_back.f_back)
+            return pkinspect.Location(frame)
+
+        def values():
+            return (fmt, args, kwargs)
+
+        self._process(prefix, msg, values, pid_time, with_control, site)
+
 
-        self._process(prefix, msg, pid_time, with_control)
+class _SiteMap(object):
+    """Values by call site which do not keep code objects alive
+
+    Sites are (code, lineno) or, for logging records, (pathname,
+    lineno). Code objects are weakly referenced, like the cache in
+    `pkinspect.Location`, so exec'd code is freed along with its values.
+    """
+    def __init__(self):
+        self._codes = weakref.WeakKeyDictionary()
+        self._paths = {}
+
+    def __getitem__(self, site):
+        return self._map(site[0])[site[0]][site[1]]
+
+    def __len__(self):
+        return sum(
+            len(l) for m in (self._codes, self._paths) for l in list(m.values())
+        )
+
+    def __setitem__(self, site, value):
+        m = self._map(site[0])
+        try:
+            l = m[site[0]]
+        except KeyError:
+            l = m[site[0]] = {}
+        l[site[1]] = value
+
+    def get(self, site, default=None):
+        try:
+            return self[site]
+        except KeyError:
+            return default
+
+    def items(self):
+        """Sites and values
+
+        Returns:
+            list: ((code or pathname, lineno), value)
+        """
+        return [
+            ((k, n), v)
+            for m in (self._codes, self._paths)
+            for k, l in list(m.items())
+            for n, v in l.items()
+        ]
+
+    def values(self):
+        return [v for _, v in self.items()]
+
+    def _map(self, key):
+        return self._paths if isinstance(key, six.string_types) else self._codes
+
+
+def _after_fork():
+    """Reset state shared with the parent in a forked child
+
+    The async writer's thread does not exist in the child, and its
+    lock (or the suppressed counts lock) may have been held at the fork,
+    so they are recreated. Suppressed counts are reported by the parent.
+    """
+    try:
+        if not _printer:
+            return
+        if _printer.async_writer:
+            _printer.async_writer._start()
+        _printer.suppressed = _SiteMap()
+        _printer.suppressed_lock = threading.Lock()
+        _printer.suppressed_timer = None
+    except Exception:
+        pass
+
+
+def _async_flush():
+    """Flushes the async writer before fork (and at exit)"""
+    try:
+        if _printer and _printer.async_writer:
+            _printer.async_writer.flush()
+    except Exception:
+        pass
+
+
+def _atexit():
+    """Writes summary of suppressed messages and flushes the async writer"""
+    try:
+        if _printer:
+            _printer._suppressed_flush()
+    except Exception:
+        pass
+    _async_flush()
+
+
+def _cfg_async_overflow(anything):
+    assert anything in ASYNC_OVERFLOW_POLICIES, \
+        '{}: async_overflow must be one of {}'.format(
+            anything, ASYNC_OVERFLOW_POLICIES)
+    return anything
 
 
 def _cfg_control(anything):
@@ -511,10 +1123,143 @@ def _cfg_control(anything):
     return re.compile(anything, flags=re.IGNORECASE)
 
 
+def _cfg_format(anything):
+    assert anything in FORMATS, \
+        '{}: format must be one of {}'.format(anything, FORMATS)
+    return anything
+
+
 def _cfg_output(anything):
     if hasattr(anything, 'write'):
         return anything
-    return open(anything, 'w')
+    return _AppendFile(anything)
+
+
+def _cfg_reload(params, keys):
+    """Reinitialize after `pkconfig.reload` changes `cfg`
+
+    Arguments to the last `init` are applied over the new `cfg`.
+    """
+    init(**_init_kwargs)
+
+
+def _cfg_sample_rate(anything):
+    anything = float(anything)
+    assert 0.0 < anything <= 1.0, \
+        '{}: sample_rate must be greater than 0 and at most 1'.format(anything)
+    return anything
+
+
+def _control_anchor(control):
+    """Literal text which must begin the match of `control`
+
+    Only controls anchored with ``^`` (or ``\\A``) without alternation
+    have a leading literal. Text stops at the first meta character.
+
+    Args:
+        control (re.RegexObject): compiled control or None
+
+    Returns:
+        str: lower case literal text or None if not anchored
+    """
+    if not control or control.flags & (re.MULTILINE | re.VERBOSE):
+        return None
+    p = control.pattern
+    if p.startswith('^'):
+        p = p[1:]
+    elif p.startswith('\\A'):
+        p = p[2:]
+    else:
+        return None
+    if '|' in p:
+        return None
+    res = ''
+    i = 0
+    while i < len(p):
+        c = p[i]
+        if c == '\\':
+            if i + 1 >= len(p) or p[i + 1].isalnum():
+                break
+            c = p[i + 1]
+            i += 2
+        elif c in _CONTROL_META:
+            break
+        else:
+            i += 1
+        if i < len(p) and p[i] in _CONTROL_OPTIONAL:
+            break
+        res += c
+    return res.lower()
+
+
+def _control_has_lookaround(control):
+    """Can `control` look at text beyond its match?
+
+    Args:
+        control (re.RegexObject): compiled control
+
+    Returns:
+        bool: True if pattern contains a lookahead or lookbehind
+    """
+    p = control.pattern
+    return '(?=' in p or '(?!' in p or '(?<' in p
+
+
+def _jsonl_value(value):
+    """Value if it can be encoded as JSON, else its repr
+
+    Args:
+        value (object): argument to a message
+
+    Returns:
+        object: value or str
+    """
+    try:
+        json.dumps(value, default=str)
+        return value
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+def _sighup_handler(signum, frame):
+    """Tells `_AppendFile` instances to reopen and calls previous handler"""
+    global _sighup_generation
+    _sighup_generation += 1
+    if callable(_sighup_prev):
+        _sighup_prev(signum, frame)
+
+
+def _sighup_install():
+    """Reopen output files on SIGHUP, if possible
+
+    Only called when `reopen_on_sighup` is set, because the handler
+    replaces the default disposition (exit). A previous Python handler
+    is chained. Signal handlers can only be installed from the main thread.
+    """
+    global _sighup_installed
+    global _sighup_prev
+    if _sighup_installed or not hasattr(signal, 'SIGHUP'):
+        return
+    try:
+        _sighup_prev = signal.signal(signal.SIGHUP, _sighup_handler)
+        _sighup_installed = True
+    except ValueError:
+        pass
+
+
+def _site_str(site):
+    """Location of call site for summaries
+
+    Args:
+        site (tuple): (code or pathname, lineno)
+
+    Returns:
+        str: file:line or file:line:func
+    """
+    c, l = site
+    if hasattr(c, 'co_filename'):
+        return '{}:{}:{}'.format(c.co_filename, l, c.co_name)
+    return '{}:{}'.format(c, l)
 
 
 def _z(msg):
@@ -524,11 +1269,25 @@ def _z(msg):
 
 
 cfg = pkconfig.init(
+    async_output=(False, bool, 'Write messages in batches from a background thread'),
+    async_overflow=('block', _cfg_async_overflow, 'When async queue is full: block, drop_oldest, or drop_newest'),
+    async_queue_size=(1000, int, 'Maximum number of messages queued by async_output'),
     control=(None, _cfg_control, 'Pattern to match against pkdc messages'),
+    format=('text', _cfg_format, 'Message format: text or jsonl (JSON lines)'),
     output=(None, _cfg_output, 'Where to write messages either as a "writable" or file name'),
+    rate_limit=(0, int, 'Maximum messages per second from one call site (0 is unlimited)'),
+    rate_limit_summary=(60, int, 'Seconds between reports of messages suppressed by rate_limit or sample_rate'),
     redirect_logging=(False, bool, "Redirect Python's logging to output"),
+    reopen_on_sighup=(False, bool, 'Reopen output file on SIGHUP (replaces default SIGHUP handling)'),
+    sample_rate=(1.0, _cfg_sample_rate, 'Fraction of messages written from each call site'),
     want_pid_time=(False, bool, 'Display pid and time in messages'),
 )
 
+atexit.register(_atexit)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_async_flush, after_in_child=_after_fork)
+
 if cfg:
     init()
+    pkconfig.on_reload(cfg, _cfg_reload)
@@ -38,10 +38,13 @@ of the function, class, or module.
 from __future__ import absolute_import, division, print_function
 # Imports are sorted alphabetically
 # pykern imports are "from" since all modules begin with "pk" so they are unique
+from pykern import pkarray
 from pykern import pkconfig
 # Import pkdc and pkdp functions directly. Mostly we import modules and
 # qualify uses
 from pykern.pkdebug import pkdc, pkdp
+import array
+import math
 
 # We don't follow PEP8 here. Global variables/constants are separated by one blank
 # line.
@@ -51,6 +54,15 @@ ONE = 1
 #: Another constant
 ZIPPITY = 'doodah'
 
+# Largest factor by which EMA.compute_all scales values within a block
+_BLOCK_GAIN = 2.0 ** 20
+
+# Most values EMA.compute_all processes in a block
+_BLOCK_LENGTH_MAX = 65536
+
+# Shorter blocks are slower than a simple loop
+_BLOCK_LENGTH_MIN = 64
+
 # Private constant is not documented with '#:'
 _SSSHHH = 39
 
@@ -69,6 +81,9 @@ class EMA(object):
     the __init__ method at the class level, since it is an
     implicit function call.
 
+    `compute_all` averages a whole series in one call. The average
+    is carried across calls so a long series can be streamed in chunks.
+
     Args:
         length (int): iterations
 
@@ -81,6 +96,7 @@ class EMA(object):
         assert length > 0, \
             '{}: length must be greater than 0'.format(length)
         self._alpha = 2.0 / (float(length) + 1.0)
+        self._powers = None
         self.average = None
 
     def compute(self, value):
@@ -98,6 +114,36 @@ class EMA(object):
             self.average += self._alpha * (value - self.average)
         return self.average
 
+    def compute_all(self, values):
+        """Compute the average after each of values
+
+        Equivalent to calling `compute` on each value. With numpy, the
+        recurrence is computed in blocks from its closed form, i.e.
+        a scaled cumulative sum, without a Python loop per value.
+
+        Args:
+            values (object): iterable, array.array, memoryview, or numpy.ndarray
+
+        Returns:
+            object: numpy.ndarray if values is one, else array.array of doubles
+        """
+        try:
+            import numpy
+        except ImportError:
+            return pkarray.new_double(self.compute(v) for v in values)
+        if isinstance(values, numpy.ndarray):
+            x = values.astype(float, copy=False).ravel()
+            res = numpy.empty(len(x))
+            self._filter(numpy, x, res)
+            return res
+        if isinstance(values, array.array):
+            x = pkarray.to_numpy(values).astype(float, copy=False)
+        else:
+            x = numpy.fromiter(values, dtype=float)
+        res = pkarray.new_double([0.0]) * len(x)
+        self._filter(numpy, x, pkarray.to_numpy(res))
+        return res
+
     def value(self):
         """Get the average
 
@@ -108,6 +154,60 @@ class EMA(object):
             'self.average is None and has not been initialized'
         return self.average
 
+    def _filter(self, numpy, x, out):
+        """Apply the average to x in blocks
+
+        Within a block starting after average s, the recurrence
+        ``y[i] = b * y[i-1] + a * x[i]`` is::
+
+            y[i] = b**(i+1) * s + a * b**i * cumsum(x[k] * b**-k)[i]
+
+        Blocks are limited so b**-k is at most _BLOCK_GAIN to bound
+        the loss of precision. For short lengths, the blocks would be
+        too short so a simple loop is used.
+
+        Args:
+            numpy (module): numpy
+            x (numpy.ndarray): values
+            out (numpy.ndarray): averages (same length as x)
+        """
+        n = len(x)
+        if not n:
+            return
+        i = 0
+        if self.average is None:
+            out[0] = self.average = float(x[0])
+            i = 1
+        a = self._alpha
+        b = 1.0 - a
+        if b == 0.0:
+            out[i:] = x[i:]
+            self.average = float(x[-1])
+            return
+        if self._powers is None:
+            m = int(math.log(_BLOCK_GAIN) / -math.log(b))
+            m = max(1, min(_BLOCK_LENGTH_MAX, m))
+            k = numpy.arange(m)
+            self._powers = (b ** k, b ** -k)
+        p, w = self._powers
+        s = self.average
+        if len(p) < _BLOCK_LENGTH_MIN:
+            res = []
+            for v in x[i:].tolist():
+                s += a * (v - s)
+                res.append(s)
+            out[i:] = res
+            self.average = s
+            return
+        while i < n:
+            m = min(len(p), n - i)
+            j = i + m
+            out[i:j] = p[:m] * (b * s + a * numpy.cumsum(x[i:j] * w[:m]))
+            s = out[j - 1]
+            i = j
+        self.average = float(s)
+
+
 def _Privy(object):
     """This is a private class that does nothing"""
     pass
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+u"""Profile the time spent importing modules
+
+Set ``$PYKERN_PKCLI_PROFILE_IMPORTS`` to profile a console script, e.g.::
+
+    PYKERN_PKCLI_PROFILE_IMPORTS=1 pykern pkexample echo hello
+
+The variable is checked when :mod:`pykern` is imported, which happens
+before :mod:`pykern.pkcli` and the cli modules are imported. If the
+value is ``1``, the profile is written to `DEFAULT_FILE` in the current
+directory. Otherwise, the value is the name of the file. On exit, the
+modules with the most self time are written to stderr.
+
+Imports before :mod:`pykern` are not profiled. Console scripts
+installed by :mod:`pykern.pksetup` for other packages import their
+own root package (e.g. ``sirepo`` for ``sirepo.sirepo_console``)
+first, so the root package and anything it imports before
+:mod:`pykern` are missing from the profile. To profile those, call
+`install` at the top of the root package's ``__init__.py`` or run
+``python -X importtime`` (Python 3.7+).
+
+The profile is JSON with sorted keys so that it can be diffed between
+releases. Times are in seconds. The ``cumulative`` time of a module
+includes the time to import its children, that is, the modules
+it imported first. The ``self`` time does not include its children.
+
+Only imports in the thread that called `install` are profiled. This
+module only imports the standard library so that it can be installed
+first.
+
+:copyright: Copyright (c) 2016 RadiaSoft LLC.  All Rights Reserved.
+:license: http://www.apache.org/licenses/LICENSE-2.0.html
+"""
+from __future__ import absolute_import, division, print_function
+import atexit
+import importlib
+import json
+import os
+import sys
+import time
+
+try:
+    import __builtin__ as builtins
+    from thread import get_ident
+except ImportError:
+    import builtins
+    import importlib.util
+    from threading import get_ident
+
+#: Written in the current directory when the environment variable is ``1``
+DEFAULT_FILE = 'pkimporttime.json'
+
+#: Enables profiling (see module doc)
+ENV_VAR = 'PYKERN_PKCLI_PROFILE_IMPORTS'
+
+#: Number of modules written to stderr on exit
+TOP_COUNT = 20
+
+#: PY2 `__import__` defaults to implicit relative imports
+_PY2 = sys.version_info[0] < 3
+
+#: Default level of `__import__`
+_DEFAULT_LEVEL = -1 if _PY2 else 0
+
+#: Current `_Profiler`
+_profiler = None
+
+#: Best clock for intervals
+_timer = getattr(time, 'perf_counter', time.time)
+
+
+def format_top(profile, count=TOP_COUNT):
+    """Modules with the most self time
+
+    Args:
+        profile (dict): returned by `uninstall`
+        count (int): number of modules
+
+    Returns:
+        str: table of times and module names
+    """
+    m = profile['modules']
+    res = [
+        '{:.3f}s importing {} modules'.format(profile['total'], len(m)),
+        '{:>9} {:>11}  {}'.format('self', 'cumulative', 'module'),
+    ]
+    for n in sorted(m, key=lambda n: -m[n]['self'])[:count]:
+        res.append(
+            '{self:9.4f} {cumulative:11.4f}  {}'.format(n, **m[n]),
+        )
+    return '\n'.join(res) + '\n'
+
+
+def install(filename=None, top_count=TOP_COUNT):
+    """Start profiling imports and report on exit
+
+    Args:
+        filename (str): where to write the profile on exit [`DEFAULT_FILE`]
+        top_count (int): number of modules written to stderr on exit
+    """
+    global _profiler
+
+    assert not _profiler, \
+        'import profiler is already installed'
+    _profiler = _Profiler()
+    atexit.register(_atexit, filename or DEFAULT_FILE, top_count)
+
+
+def install_from_env():
+    """Call `install` if `ENV_VAR` is set"""
+    v = os.environ.get(ENV_VAR)
+    if not v or v == '0':
+        return
+    install(None if v == '1' else v)
+
+
+def uninstall():
+    """Stop profiling imports
+
+    Returns:
+        dict: argv, modules (name to cumulative, parent, self), and total
+    """
+    global _profiler
+
+    assert _profiler, \
+        'import profiler is not installed'
+    res = _profiler.stop()
+    _profiler = None
+    return res
+
+
+def write(filename, profile):
+    """Write the profile as JSON
+
+    Args:
+        filename (str): where to write
+        profile (dict): returned by `uninstall`
+    """
+    with open(filename, 'w') as f:
+        json.dump(profile, f, indent=4, separators=(',', ': '), sort_keys=True)
+        f.write('\n')
+
+
+class _Node(object):
+    """Import which loaded at least one module"""
+    __slots__ = ('children', 'cumulative', 'name')
+
+    def __init__(self):
+        self.children = []
+        self.cumulative = 0.0
+        self.name = None
+
+
+class _Profiler(object):
+    """Replaces `__import__` and builds a tree of `_Node`
+
+    PY3 `importlib.import_module` (used by :mod:`pykern.pkcli`)
+    does not call `__import__` so it is replaced, too.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+        self.stack = [self.root]
+        self.thread = get_ident()
+        self.prev_import = builtins.__import__
+        builtins.__import__ = self._import
+        self.prev_import_module = importlib.import_module
+        if not _PY2:
+            importlib.import_module = self._import_module
+
+    def stop(self):
+        """Restore `__import__` and return the profile
+
+        Returns:
+            dict: see `uninstall`
+        """
+        builtins.__import__ = self.prev_import
+        importlib.import_module = self.prev_import_module
+        res = {}
+        self._flatten(self.root, None, res)
+        return dict(
+            argv=list(sys.argv),
+            modules=res,
+            total=round(sum(c.cumulative for c in self.root.children), 6),
+        )
+
+    def _flatten(self, node, parent, res):
+        for c in node.children:
+            m = res.setdefault(
+                c.name,
+                dict(cumulative=0.0, parent=parent, self=0.0),
+            )
+            m['cumulative'] = round(m['cumulative'] + c.cumulative, 6)
+            m['self'] = round(
+                m['self'] + c.cumulative - sum(x.cumulative for x in c.children),
+                6,
+            )
+            self._flatten(c, c.name, res)
+
+    def _import(self, name, globals=None, locals=None, fromlist=None, level=_DEFAULT_LEVEL):
+        bases = _names(name, globals, level)
+        names = bases
+        if fromlist:
+            names = bases + [b + '.' + f for b in bases for f in fromlist if f != '*']
+        return self._profile(
+            bases,
+            names,
+            self.prev_import,
+            name,
+            globals,
+            locals,
+            fromlist,
+            level,
+        )
+
+    def _import_module(self, name, package=None):
+        n = [importlib.util.resolve_name(name, package)]
+        return self._profile(n, n, self.prev_import_module, name, package)
+
+    def _profile(self, bases, names, op, *args):
+        if get_ident() != self.thread:
+            return op(*args)
+        names = [n for n in names if sys.modules.get(n) is None]
+        if not names:
+            return op(*args)
+        node = _Node()
+        self.stack.append(node)
+        start = _timer()
+        try:
+            return op(*args)
+        finally:
+            node.cumulative = _timer() - start
+            self.stack.pop()
+            parent = self.stack[-1]
+            loaded = [n for n in names if sys.modules.get(n) is not None]
+            if loaded:
+                # Submodules in fromlist are part of a module loaded with them
+                node.name = loaded[0] if len(loaded) == 1 or loaded[0] in bases \
+                    else ', '.join(loaded)
+                parent.children.append(node)
+            else:
+                parent.children.extend(node.children)
+
+
+def _atexit(filename, top_count):
+    if not _profiler:
+        return
+    p = uninstall()
+    write(filename, p)
+    sys.stderr.write(
+        '{}: {}'.format(
+            os.path.abspath(filename),
+            format_top(p, top_count),
+        ),
+    )
+
+
+def _names(name, globals, level):
+    """Modules which `__import__` may load, excluding fromlist
+
+    Args:
+        name (str): module name
+        globals (dict): of importing module
+        level (int): relative import level
+
+    Returns:
+        list: full module names, most likely first
+    """
+    res = []
+    if level != 0 and globals:
+        p = globals.get('__package__')
+        if not p:
+            p = globals.get('__name__') or ''
+            if '__path__' not in globals:
+                p = p.rpartition('.')[0]
+        if p:
+            if level > 1:
+                p = p.rsplit('.', level - 1)[0]
+            res.append(p + '.' + name if name else p)
+    if level <= 0:
+        res.append(name)
+    return res
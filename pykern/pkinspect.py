@@ -13,6 +13,7 @@ import os
 import os.path
 import re
 import sys
+import weakref
 
 #: Used to simplify paths output
 _start_dir = ''
@@ -24,6 +25,12 @@ except Exception:
 
 _VALID_IDENTIFIER_RE = re.compile(r'^[a-z_]\w*$', re.IGNORECASE)
 
+#: Code object to (relative filename, module name) for `Location`; weak so exec'd code is freed
+_location_cache = weakref.WeakKeyDictionary()
+
+#: LogRecord pathname to relative filename for `Location`
+_location_path_cache = {}
+
 
 class Call(pkcollections.Dict):
     """Saves file:line:name of stack frame and renders as string.
@@ -59,16 +66,64 @@ class Call(pkcollections.Dict):
 
     def __str__(self):
         try:
-            filename = os.path.relpath(self.filename, _start_dir)
-            if len(filename) > len(self.filename):
-                # "relpath" always makes relative even when no common components.
-                # Take the absolute (shorter) path
-                filename = self.filename
-            return '{}:{}:{}'.format(filename, self.lineno, self.name)
+            return '{}:{}:{}'.format(
+                _relative_filename(self.filename), self.lineno, self.name)
         except Exception:
             return '<no file>:0:<no func>'
 
 
+class Location(object):
+    """Compact version of `Call` for hot logging paths.
+
+    The relative filename and module name are computed once per code
+    object (or LogRecord pathname) and cached. Code objects are weakly
+    referenced and modules are looked up by name so the cache does not
+    keep exec'd code or unloaded modules alive.
+
+    Args:
+        frame_or_log (frame or LogRecord): values to extract
+
+    Attributes:
+        filename (str): full path (co_filename)
+        lineno (int): line number (f_lineno)
+        module (module): module of the frame or None for LogRecord
+        name (str): function name (co_name)
+        relative_filename (str): shorter of `filename` and its path relative to start dir
+    """
+    __slots__ = ('filename', 'lineno', 'module', 'name', 'relative_filename')
+
+    def __init__(self, frame_or_log):
+        try:
+            if hasattr(frame_or_log, 'f_code'):
+                c = frame_or_log.f_code
+                self.filename = c.co_filename
+                self.lineno = frame_or_log.f_lineno
+                self.name = c.co_name
+                try:
+                    self.relative_filename, m = _location_cache[c]
+                except KeyError:
+                    self.relative_filename = _relative_filename(self.filename)
+                    m = frame_or_log.f_globals.get('__name__')
+                    _location_cache[c] = (self.relative_filename, m)
+                self.module = sys.modules.get(m)
+            else:
+                self.filename = frame_or_log.pathname
+                self.lineno = frame_or_log.lineno
+                self.name = frame_or_log.funcName
+                self.module = None
+                try:
+                    self.relative_filename = _location_path_cache[self.filename]
+                except KeyError:
+                    self.relative_filename = _location_path_cache[self.filename] \
+                        = _relative_filename(self.filename)
+        finally:
+            if frame_or_log:
+                del frame_or_log
+
+    def __str__(self):
+        return '{}:{}:{}'.format(self.relative_filename, self.lineno, self.name)
+
+
 def caller(ignore_modules=None):
     """Which file:line:func is calling the caller of this function.
 
@@ -207,3 +262,24 @@ def submodule_name(obj):
     x = module_name_split(obj)
     x.pop(0)
     return '.'.join(x)
+
+
+def _relative_filename(filename):
+    """Path relative to start dir unless absolute is shorter
+
+    Args:
+        filename (str): full path
+
+    Returns:
+        str: shorter of relative or absolute path
+    """
+    try:
+        res = os.path.relpath(filename, _start_dir)
+    except ValueError:
+        # Windows: different drives
+        return filename
+    if len(res) > len(filename):
+        # "relpath" always makes relative even when no common components.
+        # Take the absolute (shorter) path
+        return filename
+    return res
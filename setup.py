@@ -23,6 +23,9 @@ setup(
             'dockerspawner',
             'oauthenticator',
         ],
+        'numpy': [
+            'numpy',
+        ],
     },
     entry_points={
         'pytest11': ['pykern = pykern.pytest_plugin'],
@@ -33,3 +33,109 @@ def test_new_float():
         'new_float with initializer, should be non-zero'
     assert float(5) == d[1], \
         'new_float should intitialize to a float'
+
+
+def test_file():
+    from pykern import pkunit
+    d = pkunit.empty_work_dir()
+    p = d.join('x.pka')
+    with pkarray.FileWriter(p) as w:
+        w.write(pkarray.new_double([1, 2]))
+        w.write([3, 4, 5])
+    assert 5 == w.length, \
+        'FileWriter should count all values written'
+    expect = pkarray.new_double([1, 2, 3, 4, 5])
+    assert expect == pkarray.read_file(p), \
+        'read_file should return all values written'
+    chunks = list(pkarray.iter_file(p, length=2))
+    assert [2, 2, 1] == [len(c) for c in chunks], \
+        'iter_file should return chunks of length'
+    assert expect == pkarray.new_double([x for c in chunks for x in c]), \
+        'iter_file chunks should contain values in order'
+    with pytest.raises(AssertionError):
+        with pkarray.FileWriter(d.join('y.pka')) as w:
+            w.write(pkarray.new_float([1]))
+    d.join('z.pka').write('not an array file')
+    with pytest.raises(AssertionError):
+        pkarray.read_file(d.join('z.pka'))
+
+
+def test_mmap_file():
+    numpy = pytest.importorskip('numpy')
+    from pykern import pkunit
+    d = pkunit.empty_work_dir()
+    p = d.join('x.pka')
+    with pkarray.FileWriter(p, typecode=pkarray.FLOAT_TYPECODE) as w:
+        w.write(numpy.arange(4, dtype=numpy.float64))
+    m = pkarray.mmap_file(p, writable=True)
+    assert numpy.dtype('f') == m.dtype and [0, 1, 2, 3] == list(m), \
+        'mmap_file should map values with file typecode'
+    m[1] = 9
+    m.flush()
+    del m
+    assert pkarray.new_float([0, 9, 2, 3]) == pkarray.read_file(p), \
+        'When mmap_file is writable, changes should be written to file'
+
+
+def test_numpy():
+    numpy = pytest.importorskip('numpy')
+    a = pkarray.new_double([1, 2, 3])
+    n = pkarray.to_numpy(a)
+    n[0] = 9
+    assert 9 == a[0], \
+        'to_numpy should share memory with array'
+    m = pkarray.to_memoryview(a)
+    assert 3 == len(m), \
+        'to_memoryview should view all values'
+    a2 = pkarray.from_numpy(numpy.array([4, 5], dtype=numpy.float32))
+    assert pkarray.new_float([4, 5]) == a2, \
+        'from_numpy should copy values and use dtype as typecode'
+
+
+def test_table():
+    from pykern import pkunit
+    t = pkarray.Table([
+        ('x', pkarray.DOUBLE_TYPECODE),
+        ('n', pkarray.INT_TYPECODE),
+    ])
+    t.append(1.5, 1)
+    with pytest.raises(TypeError):
+        t.append(2.5, 'not an int')
+    assert 1 == len(t) and 1 == len(t.columns['x']), \
+        'When append fails, table should be restored'
+    t.extend(dict(x=pkarray.new_double([2.5, 3.5]), n=(i for i in (2, 3))))
+    assert 3 == len(t), \
+        'When extended, length should be rows'
+    assert pkarray.new_double([2.5, 3.5]) == pkarray.new_double(t.column('x', 1).tobytes()), \
+        'column should return a slice of the column'
+    with pytest.raises(AssertionError):
+        t.extend(dict(x=[1.0], n=[1, 2]))
+    assert 3 == len(t) and 3 == len(t.columns['n']), \
+        'When extend fails, table should be restored'
+    with pytest.raises(AssertionError):
+        t.extend(dict(x=[1.0]))
+    t.extend(dict(x=pkarray.new_float([4.5]), n=[4]))
+    assert pkarray.new_double([1.5, 2.5, 3.5, 4.5]) == t.columns['x'] \
+        and 4 == t.columns['n'][-1], \
+        'When extended with array of different typecode, values should be converted'
+    d = pkunit.empty_work_dir()
+    t.save(d.join('t.pkt'))
+    t2 = pkarray.Table.load(d.join('t.pkt'))
+    assert list(t.columns) == list(t2.columns), \
+        'When loaded, columns should be in the same order'
+    for k in t.columns:
+        assert t.columns[k] == t2.columns[k], \
+            '{}: when loaded, values should be the same'.format(k)
+
+
+def test_table_numpy():
+    numpy = pytest.importorskip('numpy')
+    t = pkarray.Table([('f', pkarray.FLOAT_TYPECODE)])
+    t.extend(dict(f=numpy.arange(3, dtype=numpy.float64)))
+    assert pkarray.new_float([0, 1, 2]) == t.columns['f'], \
+        'When extended with ndarray, values should be converted'
+    t = pkarray.Table([('n', pkarray.INT_TYPECODE)])
+    with pytest.raises(TypeError):
+        t.extend(dict(n=numpy.array([1.5])))
+    assert 0 == len(t), \
+        'When ndarray would be truncated, extend should fail'
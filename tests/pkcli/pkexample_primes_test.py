@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+u"""pytest for `pykern.pkcli.pkexample.primes`
+
+:copyright: Copyright (c) 2016 RadiaSoft LLC.  All Rights Reserved.
+:license: http://www.apache.org/licenses/LICENSE-2.0.html
+"""
+from __future__ import absolute_import, division, print_function
+import pytest
+
+
+def test_primes(monkeypatch):
+    from pykern.pkcli import pkexample
+    monkeypatch.setattr(pkexample, '_SEGMENT_ODDS', 7)
+    engines = ['bytearray', 'sundaram']
+    try:
+        import numpy
+        engines.append('numpy')
+    except ImportError:
+        pass
+    for n in list(range(1, 40)) + [1000, 7919, 7920]:
+        expect = [
+            i for i in range(2, n)
+            if all(i % d for d in range(2, int(i ** 0.5) + 1))
+        ]
+        for e in engines:
+            assert expect == pkexample.primes(n, engine=e), \
+                '{}: {}: primes should be less than max_prime'.format(e, n)
+    assert pkexample.primes(1000) == pkexample.primes(1000, processes=2), \
+        'When segments are in a pool, primes should be the same'
+
+
+def test_primes_timeit():
+    from pykern.pkcli import pkexample
+    res = pkexample.primes(1000, timeit=2, engine='all').split('\n')
+    assert 2 <= len(res), \
+        '{}: engine all should report each engine'.format(res)
+    for r in res:
+        assert 'computed 168 primes' in r and 'numbers/second' in r, \
+            '{}: should report primes and throughput'.format(r)
+    with pytest.raises(Exception):
+        pkexample.primes(1000, engine='not-found')
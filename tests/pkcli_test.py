@@ -23,6 +23,31 @@ _PKGS = {
 }
 
 
+def test_batch(capsys):
+    """Many commands in one process"""
+    pkconfig.reset_state_for_testing()
+    for jobs, threads in (1, False), (2, False), (2, True):
+        actual = list(pkcli.batch(
+            'pykern',
+            [['pkexample', 'echo', 'hello-world'], ['pkexample', 'echo', 'hi']],
+            jobs=jobs,
+            threads=threads,
+        ))
+        assert ['howdy: hello-world\n', 0] == [actual[0]['output'], actual[0]['status']], \
+            '{}: first command should succeed: {}'.format(jobs, actual)
+        assert 1 == actual[1]['status'] and 'too short' in actual[1]['output'], \
+            '{}: second command should fail: {}'.format(jobs, actual)
+    with pkunit.save_chdir_work():
+        with open('cmds', 'w') as f:
+            f.write('# comment\npkexample echo hello-world\n\n["pkexample", "echo", "hi"]\n')
+        assert 1 == pkcli.main('pykern', ['pykern', '--batch', 'cmds', '-j', '2', '--threads'])
+    out, err = capsys.readouterr()
+    assert 'howdy: hello-world\n' in out, \
+        'When batch, command output should be written'
+    assert re.search(r'cmds:2: status=0 .*cmds:4: status=1 .*2 commands, 1 failed', err, flags=re.DOTALL), \
+        'When batch, status of each command should be reported: {}'.format(err)
+
+
 def test_command_error(capsys):
     with pytest.raises(argh.CommandError) as e:
         pkcli.command_error('{abc}', abc='abcdef')
@@ -60,6 +85,70 @@ def test_main3():
         'some_mod some-func: underscored module and function should work'
 
 
+def test_manifest(monkeypatch):
+    """Help is printed without importing the module"""
+    import os
+    for rp in _PKGS:
+        m = 'conf1'
+        full_name = '.'.join([rp, _PKGS[rp], m])
+        if full_name in sys.modules:
+            monkeypatch.delitem(sys.modules, full_name)
+        with pytest.raises(SystemExit):
+            _main(rp, [m, '-h'])
+        assert full_name not in sys.modules, \
+            '{}: help should not import module'.format(full_name)
+    with pkunit.save_chdir_work() as d:
+        monkeypatch.setenv('XDG_CACHE_HOME', str(d.join('cache')))
+        src = d.join('p4', 'pkcli', 'm1.py')
+        src.write('def cmd1(a, b=None, *args, **kwargs):\n    """Doc1\n\n    More"""\n', ensure=True)
+        d.join('p4', '__init__.py').write('')
+        d.join('p4', 'pkcli', '__init__.py').write('')
+        monkeypatch.syspath_prepend(str(d))
+        actual = pkcli.manifest('p4')['m1']['commands']
+        assert [dict(doc='Doc1\n\nMore', name='cmd1', signature='(a, b=None, *args, **kwargs)')] \
+            == actual, '{}: unexpected manifest'.format(actual)
+        assert 1 == len(d.join('cache', 'pykern').listdir()), \
+            'When manifest is built, it should be cached'
+        assert ['__init__.py', 'm1.py'] == sorted(x.basename for x in src.dirpath().listdir()), \
+            'Manifest should not be written in the package'
+        src.write('def cmd2():\n    pass\n\ndef _private():\n    pass\n')
+        t = os.path.getmtime(str(src)) + 10
+        os.utime(str(src), (t, t))
+        actual = pkcli.manifest('p4')['m1']['commands']
+        assert ['cmd2'] == [c['name'] for c in actual], \
+            'When module changes, manifest should be rebuilt: {}'.format(actual)
+        for code in 'def _f():\n    pass\n\ncmd3 = _f\n', \
+            'def _d(f):\n    return f\n\n@_d\ndef cmd4():\n    pass\n', \
+            'if True:\n    def cmd5():\n        pass\n':
+            src.write(code)
+            t += 10
+            os.utime(str(src), (t, t))
+            assert pkcli.manifest('p4')['m1']['commands'] is None, \
+                '{}: when commands are not known without import, commands should be None'.format(code)
+
+
+def test_manifest_help(capsys, monkeypatch):
+    """Help from manifest matches argh with signatures"""
+    pkconfig.reset_state_for_testing()
+    with pkunit.save_chdir_work() as d:
+        monkeypatch.setenv('XDG_CACHE_HOME', str(d))
+        with pytest.raises(SystemExit):
+            pkcli.main('pykern', ['pykern', 'pkexample', '--help'])
+        actual = capsys.readouterr()[0]
+        with monkeypatch.context() as m:
+            m.setattr(pkcli, '_manifest_help', lambda *args: False)
+            with pytest.raises(SystemExit):
+                pkcli.main('pykern', ['pykern', 'pkexample', '--help'])
+        expect = ' '.join(capsys.readouterr()[0].split())
+        actual = ' '.join(actual.split())
+        for c in pkcli.manifest('pykern')['pkexample']['commands']:
+            assert c['signature'] in actual, \
+                '{}: signature should be in help: {}'.format(c['signature'], actual)
+            actual = actual.replace(' ' + c['signature'], '')
+        assert expect == actual, \
+            'Manifest help should be the same as argh help'
+
+
 def _conf(root_pkg, argv, first_time=True, default_command=False):
     full_name = '.'.join([root_pkg, _PKGS[root_pkg], argv[0]])
     if not first_time:
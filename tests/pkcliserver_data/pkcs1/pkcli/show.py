@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+u"""Commands for pkcliserver_test
+
+:copyright: Copyright (c) 2016 RadiaSoft LLC.  All Rights Reserved.
+:license: http://www.apache.org/licenses/LICENSE-2.0.html
+"""
+from __future__ import absolute_import, division, print_function
+import os
+import sys
+
+
+def cwd():
+    return os.getcwd()
+
+
+def env(name):
+    return os.environ[name]
+
+
+def exit(code):
+    sys.exit(int(code))
+
+
+def stdin():
+    return sys.stdin.read().upper()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+u"""pytest for `pykern.pkcliserver`
+
+:copyright: Copyright (c) 2016 RadiaSoft LLC.  All Rights Reserved.
+:license: http://www.apache.org/licenses/LICENSE-2.0.html
+"""
+from __future__ import absolute_import, division, print_function
+import pytest
+
+
+def test_serve():
+    """Commands get the client's argv, cwd, env, and stdio"""
+    import os
+    import subprocess
+    import sys
+    import time
+    import py
+    from pykern import pkunit
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [
+            str(pkunit.data_dir()),
+            str(py.path.local(__file__).dirpath().dirpath()),
+        ] + ([env['PYTHONPATH']] if env.get('PYTHONPATH') else []),
+    )
+    with pkunit.save_chdir_work() as d:
+        sock = str(d.join('s'))
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'pykern.pkcliserver', 'serve', 'pkcs1', sock],
+            env=env,
+        )
+        try:
+            for _ in range(100):
+                if os.path.exists(sock):
+                    break
+                time.sleep(0.1)
+
+            def _call(argv, stdin=''):
+                p = subprocess.Popen(
+                    [sys.executable, '-m', 'pykern.pkcliserver', 'call', sock] + argv,
+                    cwd=str(d.join('sub').ensure(dir=True)),
+                    env=env,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                )
+                out, _ = p.communicate(stdin.encode())
+                return p.returncode, out.decode().strip()
+
+            env['PKCS1_X'] = 'xyzzy'
+            assert (0, 'xyzzy') == _call(['show', 'env', 'PKCS1_X']), \
+                'When env is set in client, command should see it'
+            env['PKCS1_X'] = 'other'
+            assert (0, 'other') == _call(['show', 'env', 'PKCS1_X']), \
+                'When env changes, the next command should see it'
+            actual = _call(['show', 'cwd'])
+            assert (0, str(d.join('sub').realpath())) == actual, \
+                '{}: command should run in client cwd'.format(actual)
+            assert (0, 'ABC') == _call(['show', 'stdin'], 'abc'), \
+                'When stdin is passed, command should read it'
+            assert 3 == _call(['show', 'exit', '3'])[0], \
+                'When command exits, client should return exit status'
+        finally:
+            server.terminate()
+            server.wait()
+        assert not os.path.exists(sock), \
+            'When server terminates, socket should be removed'
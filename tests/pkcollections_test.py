@@ -15,6 +15,21 @@ import string
 _VALUE = 1
 
 
+def test_copy():
+    import copy
+    import pickle
+    n = OrderedMapping(a=1)
+    n.b = [2]
+    for c in copy.deepcopy(n), pickle.loads(pickle.dumps(n, 2)):
+        assert n == c, \
+            'When copied, values and order should be the same'
+        assert n.b is not c.b, \
+            'When deep copied, values should be copied'
+    c.z = 3
+    assert ['a', 'b', 'z'] == list(c), \
+        'When copy is modified, order should be maintained'
+
+
 def test_delattr():
     n = OrderedMapping()
     with pytest.raises(AttributeError):
@@ -94,6 +109,48 @@ def test_eq():
         'OrderedMappings with different orders are not equal'
 
 
+def test_freeze():
+    n = OrderedMapping(a=[1, {'b': set([2])}])
+    f = pkcollections.freeze(n)
+    assert pkcollections.FrozenDict(a=(1, pkcollections.FrozenDict(b=frozenset([2])))) == f, \
+        'When frozen, nested values should be hashable types'
+    assert hash(f) == hash(pkcollections.freeze(n)), \
+        'When frozen twice, hashes should be equal'
+
+
+def test_frozen_dict():
+    import copy
+    import pickle
+    f = pkcollections.FrozenDict(a=1, b=2)
+    assert 1 == f.a and 2 == f['b'], \
+        'Attribute and item access should work'
+    for op in (
+        lambda: f.__setitem__('a', 3),
+        lambda: setattr(f, 'c', 3),
+        lambda: f.update(a=3),
+        lambda: f.pop('a'),
+        lambda: f.clear(),
+    ):
+        with pytest.raises(TypeError):
+            op()
+    assert {'a': 1, 'b': 2} == f, \
+        'When modification fails, values should be unchanged'
+    u = f.updated(b=3, c=4)
+    assert pkcollections.FrozenDict(a=1, b=3, c=4) == u, \
+        'updated should apply changes'
+    assert hash(pkcollections.FrozenDict(c=4, b=3, a=1)) == hash(u), \
+        'updated hash should match hash of constructed object'
+    assert 2 == f.b, \
+        'updated should not change the original'
+    assert 'x' == {u: 'x'}[pkcollections.FrozenDict(a=1, b=3, c=4)], \
+        'Should be usable as a dict key'
+    for c in copy.deepcopy(u), pickle.loads(pickle.dumps(u, 2)):
+        assert u == c and hash(u) == hash(c), \
+            'When copied, should be equal with same hash'
+    with pytest.raises(TypeError):
+        pkcollections.FrozenDict(a=[1])
+
+
 def test_getitem():
     n = OrderedMapping(a=1)
     assert 1 == n['a'], \
@@ -103,6 +160,23 @@ def test_getitem():
             pass
 
 
+def test_imap():
+    for n in OrderedMapping(a=1, b=2), {'a': 1, 'b': 2}:
+        i = pkcollections.imap_items(n, lambda k, v: (v + 1, k))
+        assert not isinstance(i, list), \
+            'imap_items should return an iterator'
+        assert [(2, 'a'), (3, 'b')] == sorted(i), \
+            'imap_items should call op'
+        assert [('a', 1), ('b', 2)] == sorted(pkcollections.imap_items(n)), \
+            'imap_items should return items with no op'
+        assert ['aa', 'bb'] == sorted(pkcollections.imap_keys(n, lambda k: k * 2)), \
+            'imap_keys should call op'
+        assert [2, 4] == sorted(pkcollections.imap_values(n, lambda v: v * 2)), \
+            'imap_values should call op'
+        assert [1, 2] == sorted(pkcollections.imap_values(n)), \
+            'imap_values should return values with no op'
+
+
 def test_init():
     n = OrderedMapping()
     assert [] == _keys(n), \
@@ -152,9 +226,88 @@ def test_json_load_any():
     )
     j = json.dumps({'a': 33, 'b': {'values': 'will collide, but ok'}})
     j2 = pkcollections.json_load_any(j)
+    assert type(j2.b) == dict, \
+        'When key collides with Dict attribute, should be dict'
+    assert type(j2) == pkcollections.Dict, \
+        'When no keys collide, should be Dict'
     pkcollections.json_load_any(j, object_pairs_hook=pkcollections.Dict)
 
 
+def test_json_iter_any(monkeypatch):
+    """Validate json_iter_any()"""
+    import io
+    import json
+    monkeypatch.setattr(pkcollections, '_JSON_ITER_CHUNK', 3)
+    values = [{'a': 1, 'b': [1, 2]}, 12345, u'\u00e9t\u00e9', [], {'c': {}}]
+    lines = u'\n'.join(json.dumps(v) for v in values) + u'\n'
+    array = u' [ ' + u' , '.join(json.dumps(v) for v in values) + u' ] '
+    for j in lines, array:
+        for obj in j, io.StringIO(j), io.BytesIO(j.encode('utf-8')):
+            res = list(pkcollections.json_iter_any(obj))
+            assert values == res, \
+                '{}: when read in chunks, values should be the same'.format(j)
+    res = next(pkcollections.json_iter_any(io.BytesIO(lines.encode('utf-8'))))
+    assert 1 == res.a, \
+        'When object, should be Dict'
+    assert [] == list(pkcollections.json_iter_any('[]')), \
+        'When empty array, nothing should be yielded'
+    with pytest.raises(ValueError):
+        list(pkcollections.json_iter_any(io.StringIO(u'[1, 2')))
+    with pytest.raises(ValueError):
+        list(pkcollections.json_iter_any(io.StringIO(u'{"a": 1} {"b"')))
+    values = [u'tr\u00e9s', True, None, float('inf'), u'\U0001f600']
+    j = u' '.join(json.dumps(v) for v in values)
+    for n in range(1, len(j) + 1):
+        monkeypatch.setattr(pkcollections, '_JSON_ITER_CHUNK', n)
+        res = list(pkcollections.json_iter_any(io.StringIO(j)))
+        assert values == res, \
+            '{}: chunk={} when token is split, values should be the same'.format(j, n)
+    monkeypatch.setattr(pkcollections, '_JSON_ITER_CHUNK', 3)
+    obj = io.StringIO(u'[1, x' + u' ' * 1000 + u']')
+    with pytest.raises(ValueError):
+        list(pkcollections.json_iter_any(obj))
+    assert obj.tell() < 100, \
+        'When input is malformed, should raise before reading the rest'
+
+
+def test_json_iter_any_numbers(monkeypatch):
+    """Numbers split at any chunk boundary"""
+    import io
+    values = [1.5e10, 2, -1.25, 3e-7, 10, 0.5, -2E+3]
+    cases = (
+        (u'1.5e10\n2\n-1.25\n3e-7\n10\n0.5\n-2E+3', values),
+        (u'1.5e10 2 -1.25 3e-7 10 0.5 -2E+3\n', values),
+        (u'[1.5e10,2,-1.25, 3e-7 ,10,0.5,-2E+3]', values),
+        (u'[1.25, 2]', [1.25, 2]),
+        (u'[true,1e1,false,1]', [True, 10.0, False, 1]),
+    )
+    for n in range(1, 20):
+        monkeypatch.setattr(pkcollections, '_JSON_ITER_CHUNK', n)
+        for j, expect in cases:
+            for obj in io.StringIO(j), io.BytesIO(j.encode('utf-8')):
+                res = list(pkcollections.json_iter_any(obj))
+                assert expect == res, \
+                    '{}: chunk={} unexpected values: {}'.format(j, n, res)
+
+
+def test_large():
+    keys = ['k{}'.format(i) for i in range(10000)]
+    n = OrderedMapping()
+    for k in keys:
+        n[k] = k
+    assert keys == list(n), \
+        'When many keys are added, order should be maintained'
+    assert 'k9999' in n and 'x' not in n, \
+        'When many keys, membership should work'
+    n2 = OrderedMapping(n)
+    assert n == n2, \
+        'When copied from mapping, should be equal'
+    del n2['k0']
+    n2.k0 = 'k0'
+    assert n != n2, \
+        'When key is deleted and added, order differs so not equal'
+
+
 def test_len():
     n = OrderedMapping()
     assert 0 == len(n), \
@@ -194,6 +347,20 @@ def test_map_values():
         'map_values should return values with no op'
 
 
+def test_map_values_array():
+    numpy = pytest.importorskip('numpy')
+    n = OrderedMapping(a=1)
+    n.b = 2
+    res = pkcollections.map_values_array(n, lambda v: v * 2)
+    assert isinstance(res, numpy.ndarray), \
+        'map_values_array should return ndarray'
+    assert [2.0, 4.0] == list(res), \
+        'map_values_array should call op in order'
+    res = pkcollections.map_values_array({'a': 1}, dtype=int)
+    assert numpy.dtype(int) == res.dtype and [1] == list(res), \
+        'map_values_array should return values with dtype'
+
+
 def test_mapping_merge():
     n, order = _random_init()
     pkcollections.mapping_merge(n, {})
@@ -212,6 +379,12 @@ def test_mapping_merge():
     pkcollections.mapping_merge(n2, OrderedMapping(b=3, c=4))
     assert order == _keys(n), \
         'mapping_merge with dict should replace and add'
+    d = Dict(a=1)
+    pkcollections.mapping_merge(d, {'a': 2, 'b': 3})
+    assert Dict(a=2, b=3) == d, \
+        'mapping_merge of dicts should replace and add'
+    with pytest.raises(TypeError):
+        pkcollections.mapping_merge(pkcollections.FrozenDict(), {'a': 1})
 
 
 def test_repr():
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+u"""?
+
+:copyright: Copyright (c) 2015 RadiaSoft LLC.  All Rights Reserved.
+:license: http://www.apache.org/licenses/LICENSE-2.0.html
+"""
+from __future__ import absolute_import, division, print_function
+
+from pykern import pkconfig
+
+cfg = pkconfig.init(
+    a1=('{P2_FORWARD1_B2}/x', str, 'refers to b2, which is declared later'),
+    b2=('base', str, 'referred to by a1'),
+    c3=('c', str, 'may refer to d4'),
+    d4=('{P2_FORWARD1_C3}', str, 'refers to c3'),
+)
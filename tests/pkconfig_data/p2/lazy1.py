@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+u"""?
+
+:copyright: Copyright (c) 2015 RadiaSoft LLC.  All Rights Reserved.
+:license: http://www.apache.org/licenses/LICENSE-2.0.html
+"""
+from __future__ import absolute_import, division, print_function
+
+from pykern import pkconfig
+
+#: Values passed to _parse
+parsed = []
+
+def _parse(v):
+    parsed.append(v)
+    return int(v)
+
+cfg = pkconfig.init_lazy(
+    a1=('{P2_LAZY1_B2}0', _parse, 'refers to b2'),
+    b2=(3, _parse, 'referred to by a1'),
+    group3=dict(
+        c3_1=(5, int, 'in a group'),
+    ),
+    req4=pkconfig.Required(int, 'never configured'),
+)
@@ -72,6 +72,164 @@ def test_channel_in(monkeypatch):
         pkconfig.channel_in('bad channel')
 
 
+def test_init_lazy(monkeypatch):
+    """Values resolved on access"""
+    _setup(monkeypatch)
+    # Other tests' data dirs also have a p2
+    monkeypatch.delitem(sys.modules, 'p2', raising=False)
+    pkconfig.append_load_path('p2')
+    from p2 import lazy1
+    cfg = lazy1.cfg
+    assert not lazy1.parsed, \
+        'When declared lazily, no values should be parsed'
+    assert 30 == cfg.a1, \
+        'When a1 refers to lazy b2, b2 should be resolved'
+    assert [3, '30'] == lazy1.parsed, \
+        'When a1 is resolved, b2 should be parsed first'
+    assert 3 == cfg['b2'] and 30 == cfg.a1, \
+        'When values are accessed again, should be the same'
+    assert 2 == len(lazy1.parsed), \
+        'When values are resolved, they should be memoized'
+    g = cfg.group3
+    assert {'c3_1': 5} == vars(g), \
+        'When vars() is called, values should be resolved'
+    assert 'LazyValue' not in repr(g) and g == g, \
+        'When repr() or == is called, values should be resolved'
+    assert 5 == cfg.group3.c3_1, \
+        'When value is in a group, should be resolved'
+    with pytest.raises(AssertionError):
+        pkconfig.validate(cfg)
+
+
+def test_init_forward(monkeypatch):
+    """References to values declared later use their defaults"""
+    _setup(monkeypatch)
+    monkeypatch.delitem(sys.modules, 'p2', raising=False)
+    monkeypatch.delitem(sys.modules, 'p2.forward1', raising=False)
+    pkconfig.append_load_path('p2')
+    from p2 import forward1
+    assert 'base/x' == forward1.cfg.a1, \
+        'When a1 refers to b2 declared later, b2 default should be used'
+    assert 'c' == forward1.cfg.d4, \
+        'When d4 default refers to c3, c3 should be resolved'
+
+
+def test_init_forward_cycle(monkeypatch):
+    """Cycles through defaults are reported"""
+    _setup(monkeypatch)
+    monkeypatch.setenv('P2_FORWARD1_C3', '{P2_FORWARD1_D4}')
+    monkeypatch.delitem(sys.modules, 'p2', raising=False)
+    monkeypatch.delitem(sys.modules, 'p2.forward1', raising=False)
+    pkconfig.append_load_path('p2')
+    with pytest.raises(AssertionError) as e:
+        from p2 import forward1
+    assert 'P2_FORWARD1_C3 -> P2_FORWARD1_D4 -> P2_FORWARD1_C3' in str(e.value), \
+        'When a cycle goes through a default, the chain should be reported'
+
+
+def test_interpolate(monkeypatch):
+    """References resolved in dependency order and cycles reported"""
+    home = _setup(monkeypatch)
+    monkeypatch.setenv('P2_A1', '{P2_B2}a')
+    monkeypatch.setenv('P2_B2', '{HOME}/{{b}}')
+    monkeypatch.setenv('P2_C3', '{P2_D4}')
+    monkeypatch.setenv('P2_D4', '{P2_C3}')
+    pkconfig.append_load_path('p2')
+    pkconfig._coalesce_values()
+    assert home + '/{b}a' == pkconfig._interpolate('{P2_A1}', ['X']), \
+        'When raw values refer to each other, should be resolved once'
+    with pytest.raises(AssertionError) as e:
+        pkconfig._interpolate('{P2_C3}', ['X'])
+    assert 'X -> P2_C3 -> P2_D4 -> P2_C3' in str(e.value), \
+        'When references form a cycle, the chain should be reported'
+
+
+def test_raw_keys_with_prefix(monkeypatch):
+    """Prefix index matches linear scan"""
+    _setup(monkeypatch)
+    for k in 'P1_M1_DICT1', 'P1_M1_DICT1_D4', 'P1_M1_DICT10', 'P1_M1_DICT1X':
+        monkeypatch.setenv(k, k)
+    pkconfig.append_load_path('p1')
+    pkconfig._coalesce_values()
+    for key in 'P1_M1_DICT1', 'P1_M1', 'P1_M1_DICT1_D4', 'P1_NOT_FOUND':
+        key = pkconfig._Key([key])
+        expect = [
+            k for k in reversed(sorted(pkconfig._raw_values.keys()))
+            if k == key or k.startswith(key + '_')
+        ]
+        assert expect == pkconfig._raw_keys_with_prefix(key), \
+            '{}: prefix lookup should match linear scan'.format(key)
+
+
+def test_reload(monkeypatch):
+    """Changed values are reparsed and callbacks notified"""
+    _setup(monkeypatch)
+    monkeypatch.delitem(sys.modules, 'p2', raising=False)
+    monkeypatch.delitem(sys.modules, 'p2.m1', raising=False)
+    pkconfig.append_load_path('p2')
+    from p2.m1 import cfg
+    calls = []
+    pkconfig.on_reload(cfg, lambda params, keys: calls.append(keys))
+    assert 13 == cfg.anything, \
+        'When not configured, should be default'
+    assert [] == pkconfig.reload(), \
+        'When nothing changed, no keys should change'
+    assert not calls, \
+        'When nothing changed, callback should not be called'
+    monkeypatch.setenv('P2_M1_ANYTHING', '14')
+    assert ['p2.m1.anything'] == pkconfig.reload(), \
+        'When environment changes, value should change'
+    assert 14 == cfg.anything, \
+        'When reloaded, cfg should be updated in place'
+    assert [['p2.m1.anything']] == calls, \
+        'When value changes, callback should be called with key'
+    pkconfig.reload(background=True).join()
+    assert 1 == len(calls), \
+        'When nothing changed in background, callback should not be called'
+
+
+def test_snapshot(monkeypatch):
+    """Coalesced values are loaded from snapshot"""
+    from pykern import pkunit
+    d = pkunit.empty_work_dir()
+    monkeypatch.setenv('PYKERN_PKCONFIG_SNAPSHOT_DIR', str(d))
+    _setup(monkeypatch)
+    from pykern import pkrunpy
+    calls = []
+
+    def _run_path_as_module(fname):
+        calls.append(fname)
+        return run_path_as_module(fname)
+
+    run_path_as_module = pkrunpy.run_path_as_module
+    monkeypatch.setattr(pkrunpy, 'run_path_as_module', _run_path_as_module)
+    pkconfig.append_load_path('p1')
+    expect = dict(pkconfig._coalesce_values())
+    assert 1 == len(d.listdir()), \
+        'When snapshot dir set, one snapshot should be written'
+    assert calls, \
+        'When no snapshot, home files should be executed'
+    del calls[:]
+    pkconfig.reset_state_for_testing()
+    assert expect == pkconfig._coalesce_values(), \
+        'Values from snapshot should be the same'
+    assert not calls, \
+        'When snapshot is valid, home files should not be executed'
+    pkconfig.reset_state_for_testing()
+    monkeypatch.setenv('PKCONFIG_TEST_SNAPSHOT', 'changed')
+    pkconfig._coalesce_values()
+    assert calls, \
+        'When environment changes, snapshot should not be used'
+    snapshot = d.listdir()[0]
+    for path, mode in (snapshot, 0o664), (d, 0o777):
+        path.chmod(mode)
+        del calls[:]
+        pkconfig.reset_state_for_testing()
+        pkconfig._coalesce_values()
+        assert calls, \
+            '{}: when group or other writable, snapshot should not be used'.format(path)
+
+
 def _setup(monkeypatch):
     # Can't import anything yet
     global pkconfig
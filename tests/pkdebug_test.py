@@ -6,6 +6,7 @@ u"""pytest for `pykern.pkdebug`
 """
 from __future__ import absolute_import, division, print_function
 
+import gc
 import inspect
 import os
 import os.path
@@ -38,6 +39,244 @@ def test_init(capsys):
         'When output has time, matches regex'
 
 
+def test_init_async():
+    """Messages written by background thread"""
+    from pykern import pkdebug
+    output = six.StringIO()
+    pkdebug.init(output=output, async_output=True, async_queue_size=3)
+    for i in range(100):
+        pkdebug.pkdp('async{}', i)
+    pkdebug._printer.async_writer.flush()
+    actual = re.findall(r'async(\d+)', output.getvalue())
+    assert [str(i) for i in range(100)] == actual, \
+        'When async_output and block, all messages written in order'
+    if hasattr(os, 'register_at_fork'):
+        w = pkdebug._printer.async_writer
+        pid = os.fork()
+        if pid == 0:
+            ok = w._pid == os.getpid() and w._thread.is_alive()
+            os._exit(0 if ok else 1)
+        assert 0 == os.waitpid(pid, 0)[1], \
+            'When forked, child should restart async writer'
+    pkdebug.init(output=output)
+    assert pkdebug._printer.async_writer is None, \
+        'When async_output is not set, there is no writer'
+
+
+def test_init_async_overflow():
+    """Overflow policies drop and count messages"""
+    import threading
+    from pykern import pkdebug
+    for overflow, expect in ('drop_newest', 'm0m1'), ('drop_oldest', 'm2m3'):
+        out = []
+        release = threading.Event()
+
+        def _write(msg):
+            release.wait()
+            out.append(msg)
+
+        w = pkdebug._AsyncWriter(
+            _write, 2, overflow, lambda count: 'dropped {} messages\n'.format(count))
+        # First message is taken by the thread, which blocks in _write
+        w.put('first')
+        while w._queue:
+            pass
+        for i in range(4):
+            w.put('m{}'.format(i))
+        release.set()
+        w.close()
+        actual = ''.join(out)
+        assert actual.startswith('first' + expect), \
+            '{}: unexpected messages written: {}'.format(overflow, actual)
+        assert 2 == w.drop_count, \
+            '{}: two messages should be dropped: {}'.format(overflow, w.drop_count)
+        assert 'dropped 2 messages' in actual, \
+            '{}: drops should be reported: {}'.format(overflow, actual)
+    import json
+    pkdebug.init(output=six.StringIO(), async_output=True, format='jsonl')
+    actual = json.loads(pkdebug._printer.async_writer.dropped(3))
+    assert [3] == actual['args'] and 'dropped' in actual['fmt'], \
+        'When format is jsonl, drops should be reported as JSON: {}'.format(actual)
+    pkdebug.init(output=None)
+
+
+def test_init_jsonl():
+    """JSON lines contain unformatted fields"""
+    import json
+
+    class _NotFormatted(object):
+        def __format__(self, spec):
+            raise AssertionError('should not be formatted')
+
+        def __str__(self):
+            return 'nf'
+
+    from pykern import pkdebug
+    output = six.StringIO()
+    pkdebug.init(output=output, format='jsonl')
+    pkdebug.pkdp('v={} k={k}', _NotFormatted(), k=3)
+    line = inspect.currentframe().f_lineno - 1
+    actual = json.loads(output.getvalue())
+    for k, v in (
+        ('file', __file__.rstrip('c')),
+        ('line', line),
+        ('func', 'test_init_jsonl'),
+        ('pid', os.getpid()),
+        ('thread', 0),
+        ('fmt', 'v={} k={k}'),
+        ('args', ['nf']),
+        ('kwargs', {'k': 3}),
+    ):
+        assert v == actual[k], \
+            '{}: expected {} != actual {}'.format(k, v, actual[k])
+    assert re.search(r'^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d+Z$', actual['time']), \
+        '{}: time should be ISO 8601 UTC'.format(actual['time'])
+    output = six.StringIO()
+    pkdebug.init(output=output, format='jsonl', control='xyzzy')
+    pkdebug.pkdc('no match')
+    pkdebug.pkdc('{} match', 'xyzzy')
+    actual = [json.loads(l) for l in output.getvalue().splitlines()]
+    assert 1 == len(actual) and ['xyzzy'] == actual[0]['args'], \
+        'When format is jsonl, pkdc still respects control: {}'.format(actual)
+    output = six.StringIO()
+    pkdebug.init(output=output, format='jsonl')
+    circular = []
+    circular.append(circular)
+    for i in range(pkdebug.MAX_EXCEPTION_COUNT + 1):
+        pkdebug.pkdp('{} {} {x}', {(1, 2): 3}, circular, x=i)
+    actual = [json.loads(l) for l in output.getvalue().splitlines()]
+    assert pkdebug.MAX_EXCEPTION_COUNT + 1 == len(actual), \
+        'When values cannot be encoded, messages should still be written'
+    assert ['{(1, 2): 3}', '[[...]]'] == actual[0]['args'] \
+        and {'x': 0} == actual[0]['kwargs'], \
+        'When values cannot be encoded, repr should be used: {}'.format(actual[0])
+    pkdebug.init(output=None)
+
+
+def test_init_output_processes():
+    """Lines from many processes are not torn"""
+    from pykern import pkunit
+    from pykern import pkdebug
+    import signal
+    f = pkunit.empty_work_dir().join('many')
+    pkdebug.init(output=str(f))
+    assert signal.getsignal(signal.SIGHUP) is not pkdebug._sighup_handler, \
+        'When reopen_on_sighup is not set, SIGHUP should not be handled'
+    pids = []
+    for p in range(8):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                for i in range(100):
+                    pkdebug.pkdp('{} {} {}', p, i, str(p) * 3000)
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    from pykern import pkio
+    lines = pkio.read_text(f).splitlines()
+    assert 800 == len(lines), \
+        '{}: expected 800 lines'.format(len(lines))
+    for l in lines:
+        m = re.search(r' (\d) (\d+) (\d+)$', l)
+        assert m and m.group(3) == m.group(1) * 3000, \
+            '{}: line was torn'.format(l[:100])
+    # Log rotation
+    pkdebug.init(output=str(f), reopen_on_sighup=True)
+    r = f.new(basename='rotated')
+    f.rename(r)
+    os.kill(os.getpid(), signal.SIGHUP)
+    pkdebug.pkdp('after_rotate')
+    assert 'after_rotate' in pkio.read_text(f), \
+        'After SIGHUP, output should be reopened'
+    assert 'after_rotate' not in pkio.read_text(r), \
+        'After SIGHUP, rotated file should not be written'
+    pkdebug.init(output=None)
+
+
+def test_init_reload():
+    """init arguments survive pkconfig.reload"""
+    from pykern import pkdebug
+    output = six.StringIO()
+    pkdebug.init(output=output, control='reload_xyzzy')
+    pkdebug._cfg_reload(pkdebug.cfg, ['pykern.pkdebug.want_pid_time'])
+    pkdebug.pkdc('reload_xyzzy')
+    assert 'reload_xyzzy' in output.getvalue(), \
+        'After reload, output and control from init should be kept'
+    pkdebug.init(output=None)
+
+
+def test_pid_time_cache():
+    """Time is formatted once per second, thread id once per thread"""
+    import threading
+    from pykern import pkdebug
+    pkdebug.init(output=six.StringIO(), want_pid_time=True)
+    p = pkdebug._printer
+    t = 1500000000.25
+    expect = p._pid_time(12345, t)
+    assert expect.startswith('Jul 14 02:40:00 12345     0 '), \
+        '{}: unexpected pid time prefix'.format(expect)
+    cache = p.pid_time_second
+    assert expect == p._pid_time(12345, t + 0.5), \
+        'When same second, prefix is the same'
+    assert cache is p.pid_time_second, \
+        'When same second, time should not be reformatted'
+    assert 'Jul 14 02:40:01' in p._pid_time(12345, t + 1), \
+        'When second changes, time is reformatted'
+    ids = []
+    th = threading.Thread(target=lambda: ids.extend([p._thread_id(), p._thread_id()]))
+    th.start()
+    th.join()
+    assert 0 == p._thread_id() and ids[0] == ids[1] and ids[0] != 0, \
+        '{}: thread ids should be cached per thread'.format(ids)
+
+
+def test_rate_limit():
+    """Per site limits and suppressed message summary"""
+    from pykern import pkdebug
+    output = six.StringIO()
+    pkdebug.init(output=output, rate_limit=2, rate_limit_summary=0)
+    # Ensure all calls in the same second
+    import time
+    while time.time() % 1 > 0.5:
+        time.sleep(0.1)
+    for i in range(5):
+        pkdebug.pkdp('site1 {}', i)
+        pkdebug.pkdp('site2 {}', i)
+    actual = output.getvalue()
+    assert 2 == len(re.findall('site1', actual)) and 2 == len(re.findall('site2', actual)), \
+        'When rate_limit is 2, two messages per site: {}'.format(actual)
+    assert re.search(r'suppressed \d+ messages from .*pkdebug_test.py:\d+:test_rate_limit', actual), \
+        'When messages suppressed, summary should be output: {}'.format(actual)
+    output = six.StringIO()
+    pkdebug.init(output=output, sample_rate=0.01, rate_limit_summary=1000)
+    for i in range(100):
+        pkdebug.pkdp('sampled')
+    assert len(re.findall('sampled', output.getvalue())) < 10, \
+        'When sample_rate is small, most messages should be suppressed'
+    assert sum(pkdebug._printer.suppressed.values()) > 90, \
+        'Suppressed messages should be counted'
+    pkdebug.init(output=six.StringIO())
+    assert re.search(r'suppressed \d+ messages', output.getvalue()), \
+        'When init is called, pending summary should be written'
+    import json
+    output = six.StringIO()
+    pkdebug.init(output=output, format='jsonl', rate_limit=1, rate_limit_summary=1)
+    while time.time() % 1 > 0.5:
+        time.sleep(0.1)
+    for i in range(3):
+        pkdebug.pkdp('jsonl_site')
+    time.sleep(1.5)
+    lines = [json.loads(l) for l in output.getvalue().splitlines()]
+    assert 2 == len(lines), \
+        'When summary timer expires, summary should be written: {}'.format(lines)
+    assert 'pykern.pkdebug: suppressed {} messages from {}' == lines[1]['fmt'] \
+        and 2 == lines[1]['args'][0], \
+        'When format is jsonl, summary should be a JSON object: {}'.format(lines)
+    pkdebug.init(output=None)
+
+
 def test_init_deviance(capsys):
     """Test init exceptions"""
     import pykern.pkdebug as d
@@ -203,6 +442,50 @@ def test_pkdc_deviance(capsys):
         'When exception_count exceeds MAX_EXCEPTION_COUNT, no output'
 
 
+def test_pkdc_sites(capsys):
+    """Location decides match once per call site"""
+    this_file = os.path.relpath(__file__)
+    from pykern import pkdebug
+    from pykern.pkdebug import pkdc, init
+
+    def _site(msg):
+        pkdc(msg)
+        return inspect.currentframe().f_lineno - 1
+
+    init(control='^' + re.escape(this_file) + ':1:')
+    line = _site('never')
+    out, err = capsys.readouterr()
+    assert '' == err, \
+        'When anchored control does not match location, no output'
+    sites = pkdebug._printer.control_sites
+    assert [False] == list(sites.values()), \
+        'When anchored control cannot match location, site is never: {}'.format(sites)
+    init(control=this_file + ':' + str(line) + ':_site')
+    _site('always')
+    _site('again')
+    out, err = capsys.readouterr()
+    assert 'always' in err and 'again' in err, \
+        'When control matches location, every message is output'
+    assert [True] == list(pkdebug._printer.control_sites.values()), \
+        'When control matches location, site is always'
+    init(control='xyzzy')
+    _site('no match')
+    _site('xyzzy match')
+    out, err = capsys.readouterr()
+    assert 'no match' not in err and 'xyzzy match' in err, \
+        'When control only matches message, message is searched'
+    assert [None] == list(pkdebug._printer.control_sites.values()), \
+        'When control does not match location, site is undecided'
+    c = compile('pkdc("exec")', 'exec_site', 'exec')
+    exec(c, dict(pkdc=pkdc))
+    assert 2 == len(pkdebug._printer.control_sites), \
+        'When exec code calls pkdc, site should be added'
+    del c
+    gc.collect()
+    assert 1 == len(pkdebug._printer.control_sites), \
+        'When exec code is freed, site should be removed'
+
+
 def test_pkdexc():
     """Basic output and return with `pkdp`"""
     from pykern.pkdebug import init, pkdexc
@@ -45,3 +45,35 @@ def test_ema_init_deviance():
     with pytest.raises(AssertionError) as e:
         pkexample.EMA(0)
     assert 'must be greater' in str(e.value)
+
+
+def test_ema_compute_all():
+    from pykern import pkarray
+    from pykern import pkexample
+    import random
+    values = [random.uniform(-100, 100) for _ in range(5000)]
+    for length in 1, 4, 100:
+        e = pkexample.EMA(length)
+        expect = [e.compute(v) for v in values]
+        e = pkexample.EMA(length)
+        res = list(e.compute_all(pkarray.new_double(values[:1234])))
+        res.extend(e.compute_all(iter(values[1234:])))
+        assert len(expect) == len(res), \
+            '{}: compute_all should return one value per value'.format(length)
+        for i, (x, y) in enumerate(zip(expect, res)):
+            assert abs(x - y) <= 1e-9 * max(1.0, abs(x)), \
+                '{}: values[{}]: compute={} compute_all={}'.format(length, i, x, y)
+        assert res[-1] == e.value(), \
+            '{}: compute_all should carry average across chunks'.format(length)
+
+
+def test_ema_compute_all_numpy():
+    numpy = pytest.importorskip('numpy')
+    from pykern import pkexample
+    x = numpy.arange(10.)
+    res = pkexample.EMA(4).compute_all(x)
+    assert isinstance(res, numpy.ndarray), \
+        'When values is ndarray, result should be ndarray'
+    e = pkexample.EMA(4)
+    assert [e.compute(v) for v in x] == pytest.approx(list(res)), \
+        'compute_all should equal compute on each value'
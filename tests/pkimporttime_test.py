@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+u"""pytest for `pykern.pkimporttime`
+
+:copyright: Copyright (c) 2016 RadiaSoft LLC.  All Rights Reserved.
+:license: http://www.apache.org/licenses/LICENSE-2.0.html
+"""
+from __future__ import absolute_import, division, print_function
+import pytest
+
+
+def test_env(monkeypatch):
+    """Console scripts are profiled via the environment"""
+    import json
+    import os
+    import py
+    import subprocess
+    import sys
+    from pykern import pkimporttime
+    from pykern import pkunit
+
+    p = os.environ.get('PYTHONPATH')
+    monkeypatch.setenv(
+        'PYTHONPATH',
+        os.pathsep.join(
+            [str(py.path.local(__file__).dirpath().dirpath())]
+            + ([p] if p else []),
+        ),
+    )
+    with pkunit.save_chdir_work() as d:
+        fn = d.join('p.json')
+        monkeypatch.setenv(pkimporttime.ENV_VAR, str(fn))
+        p = subprocess.Popen(
+            [sys.executable, '-c', 'import pykern; from pykern import pkconfig'],
+            stderr=subprocess.PIPE,
+        )
+        _, err = p.communicate()
+        assert 0 == p.returncode, \
+            '{}: profiled process should succeed'.format(err)
+        assert 'importing' in err.decode(), \
+            '{}: top modules should be written on exit'.format(err)
+        with open(str(fn)) as f:
+            m = json.load(f)['modules']
+        assert 'pykern.pkconfig' in m, \
+            '{}: pkconfig import should be profiled'.format(sorted(m))
+
+
+def test_install(monkeypatch):
+    """Tree of self and cumulative times"""
+    import json
+    from pykern import pkimporttime
+    from pykern import pkunit
+
+    with pkunit.save_chdir_work() as d:
+        d.join('pkit1', '__init__.py').write('', ensure=True)
+        d.join('pkit1', 'm1.py').write(
+            'import time\nfrom pkit1 import m2\ntime.sleep(0.01)\n')
+        d.join('pkit1', 'm2.py').write('import time\ntime.sleep(0.05)\n')
+        monkeypatch.syspath_prepend(str(d))
+        pkimporttime.install()
+        try:
+            import pkit1.m1
+            import pkit1.m1
+        finally:
+            p = pkimporttime.uninstall()
+        m = p['modules']
+        assert 'pkit1.m1' == m['pkit1.m2']['parent'], \
+            '{}: m2 should be a child of m1'.format(m)
+        assert 0.05 <= m['pkit1.m2']['self'], \
+            '{}: m2 self time is too small'.format(m)
+        m1 = m['pkit1.m1']
+        assert 0.01 <= m1['self'] < m1['cumulative'] - 0.05, \
+            '{}: m1 self time should not include m2'.format(m1)
+        assert 'pkit1.m2' in pkimporttime.format_top(p, 1), \
+            'Module with most self time should be first'
+        pkimporttime.write('p.json', p)
+        with open('p.json') as f:
+            assert p == json.load(f), \
+                'Written profile should be the same as returned profile'
+    with pytest.raises(AssertionError):
+        pkimporttime.uninstall()
@@ -89,3 +89,35 @@ def test_submodule_name():
 def test_root_pkg():
     m2 = pkunit.import_module_from_data_dir('p1.p2.m2')
     assert pkinspect.root_package(m2) == 'p1'
+
+
+def test_location():
+    import inspect
+    import logging
+    import os.path
+    l = pkinspect.Location(inspect.currentframe())
+    expect = inspect.currentframe().f_lineno - 1
+    assert expect == l.lineno, \
+        '{}: unexpected lineno, should be {}'.format(l.lineno, expect)
+    assert 'test_location' == l.name
+    assert sys.modules[__name__] == l.module, \
+        '{}: module should be this module'.format(l.module)
+    c = pkinspect.Call(inspect.currentframe())
+    c.lineno = l.lineno
+    assert str(c) == str(l), \
+        '{} != {}: Location should format same as Call'.format(l, c)
+    assert os.path.relpath(l.filename) == l.relative_filename
+    r = logging.LogRecord('n', logging.INFO, '/x/y.py', 3, 'm', (), None, 'f')
+    l = pkinspect.Location(r)
+    assert ('/x/y.py', 3, 'f', None) == (l.filename, l.lineno, l.name, l.module)
+    with pytest.raises(AttributeError):
+        l.other = 1
+    import gc
+    g = {}
+    exec(compile('import inspect\ndef f():\n    return inspect.currentframe()\n', 'x.py', 'exec'), g)
+    l = pkinspect.Location(g['f']())
+    n = len(pkinspect._location_cache)
+    del g
+    gc.collect()
+    assert n - 1 == len(pkinspect._location_cache), \
+        'When exec code is freed, Location cache entry should be removed'